@@ -1,12 +1,97 @@
-"""Library init"""
-
-from .aiochroma import AIOChroma
-from .connection import Connection
-from .dataclass import Color, Key
-from .error import (
-    ChromaError,
-    ChromaResultError,
-    ChromaUnknownLayout,
-    ChromaUnknownTarget,
-    ChromaWrongParameter,
-)
+"""Library init
+
+Public names are imported from their modules on first access, so
+`import aiochroma` doesn't pull in aiohttp, NumPy or the layouts
+"""
+
+from __future__ import annotations
+
+from importlib import import_module
+from typing import TYPE_CHECKING, Any
+
+# Public name -> module it lives in
+_EXPORTS = {
+    "AIOChroma": ".aiochroma",
+    "EffectCache": ".cache",
+    "Connection": ".connection",
+    "Color": ".dataclass",
+    "Key": ".dataclass",
+    "TargetState": ".dataclass",
+    "brightness_table": ".dataclass",
+    "pack_colors": ".dataclass",
+    "scale_packed": ".dataclass",
+    "unpack_colors": ".dataclass",
+    "Animation": ".effects",
+    "ChromaCircuitOpen": ".error",
+    "ChromaError": ".error",
+    "ChromaPayloadError": ".error",
+    "ChromaResultError": ".error",
+    "ChromaSessionExpired": ".error",
+    "ChromaTimeout": ".error",
+    "ChromaTransportError": ".error",
+    "ChromaUnknownLayout": ".error",
+    "ChromaUnknownTarget": ".error",
+    "ChromaWrongParameter": ".error",
+    "Frame": ".frame",
+    "KeyboardFrame": ".frame",
+    "available_layouts": ".layout",
+    "register_keymap": ".layout",
+    "register_layout": ".layout",
+    "ChromaMetrics": ".metrics",
+    "ChromaTrace": ".metrics",
+    "AIOChromaPool": ".pool",
+    "FrameReader": ".recorder",
+    "FrameRecorder": ".recorder",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name: str) -> Any:
+    """Import the public name from its module"""
+
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    value = getattr(import_module(_EXPORTS[name], __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    """Names of the module including the lazy ones"""
+
+    return sorted(set(globals()) | set(_EXPORTS))
+
+
+if TYPE_CHECKING:
+    from .aiochroma import AIOChroma
+    from .cache import EffectCache
+    from .connection import Connection
+    from .dataclass import (
+        Color,
+        Key,
+        TargetState,
+        brightness_table,
+        pack_colors,
+        scale_packed,
+        unpack_colors,
+    )
+    from .effects import Animation
+    from .error import (
+        ChromaCircuitOpen,
+        ChromaError,
+        ChromaPayloadError,
+        ChromaResultError,
+        ChromaSessionExpired,
+        ChromaTimeout,
+        ChromaTransportError,
+        ChromaUnknownLayout,
+        ChromaUnknownTarget,
+        ChromaWrongParameter,
+    )
+    from .frame import Frame, KeyboardFrame
+    from .layout import available_layouts, register_keymap, register_layout
+    from .metrics import ChromaMetrics, ChromaTrace
+    from .pool import AIOChromaPool
+    from .recorder import FrameReader, FrameRecorder
@@ -2,41 +2,70 @@
 
 from __future__ import annotations
 
-import json
+import asyncio
 import logging
-from typing import Any
+from dataclasses import dataclass
+from functools import partial
+from typing import Any, Awaitable, Callable, Iterable
 
 import aiohttp
 
+from .cache import EffectCache
 from .connection import Connection
 from .const import (
+    CHROMA_CUSTOM,
     CHROMA_EFFECT,
-    CHROMA_KEYBOARD_HEIGHT,
+    CHROMA_GEOMETRY,
+    CHROMA_ID,
+    CHROMA_IDS,
     CHROMA_KEYBOARD_WIDTH,
     CHROMA_PARAM,
     CHROMA_TARGETS,
     DEFAULT_BRIGHTNESS,
     DEFAULT_COLOR,
+    DEFAULT_DEBOUNCE,
+    DEFAULT_FPS,
+    DEFAULT_PORT,
     DEFAULT_SLEEP,
     DEFAULT_SPACING,
-    EFFECT_CUSTOM,
-    EFFECT_NONE,
-    EFFECT_STATIC,
-    KEY_CODES,
     KEY_HEADSET,
     KEY_KEYBOARD,
     KEY_KEYPAD,
     KEY_LINK,
     KEY_MOUSE,
     KEY_MOUSEPAD,
-    KEYREG,
-    LAYOUT,
+    URL_EFFECT,
 )
-from .dataclass import Color
-from .error import ChromaUnknownLayout, ChromaUnknownTarget, ChromaWrongParameter
+from .dataclass import Color, TargetState
+from .effects import Animation, FrameSource
+from .encoder import Encoder, get_encoder
+from .error import (
+    ChromaError,
+    ChromaResultError,
+    ChromaTimeout,
+    ChromaUnknownTarget,
+    ChromaWrongParameter,
+)
+from .frame import Frame, KeyboardFrame
+from .generators import compile_sequence
+from .layout import compile_layout, key_indices, layout_tokens, parse_message
+from .metrics import ChromaTrace
+from .recorder import FrameRecorder
 
 _LOGGER = logging.getLogger(__name__)
 
+StateListener = Callable[[TargetState], None]
+
+
+@dataclass(frozen=True)
+class _Snapshot:
+    """State of the target to restore after an effect"""
+
+    target: str
+    state: dict[str, Any]
+    frame: Frame
+    custom: bool
+
 
 class AIOChroma:
     """AIOChroma class"""
@@ -47,16 +76,53 @@ class AIOChroma:
         targets: list["str"],
         layout: str,
         session: aiohttp.ClientSession | None = None,
+        port: int = DEFAULT_PORT,
+        pacing: bool = False,
+        coalesce: bool = False,
+        effect_cache: int = 0,
+        heartbeat: float | None = None,
+        skip_unchanged: bool = True,
+        trace: ChromaTrace | None = None,
+        encoder: str | None = None,
+        timeouts: dict[str, float | None] | None = None,
+        retry: bool = False,
+        recorder: FrameRecorder | None = None,
+        debounce: float = DEFAULT_DEBOUNCE,
     ):
         """Initialize AIOChroma module"""
 
-        if layout in LAYOUT:
-            self._layout = LAYOUT[layout].copy()
-        else:
-            raise ChromaUnknownLayout(layout)
-
-        self._connection: Connection = Connection(host, session=session)
+        # Compiled layouts are shared between instances and looked up by name.
+        # Compile now to reject an unknown layout early
+        compile_layout(layout)
+        self._layout_name = layout
+        self._keymap = layout_tokens(layout)[0]
+
+        self._encoder: Encoder = get_encoder(encoder)
+        self._connection: Connection = Connection(
+            host,
+            port=port,
+            session=session,
+            pacing=pacing,
+            trace=trace,
+            encoder=self._encoder,
+            timeouts=timeouts,
+            retry=retry,
+        )
         self._connected: bool = False
+        self._coalesce: bool = coalesce
+        self._heartbeat: float | None = heartbeat
+
+        # Last payload applied to each target to skip no-op requests
+        self._skip_unchanged: bool = skip_unchanged
+        self._applied: dict[str, bytes] = dict()
+        self._applied_sid: int | None = None
+        self._elided: dict[str, int] = dict()
+
+        # Custom frames uploaded to the SDK once and applied by ID
+        self._effect_cache: EffectCache | None = (
+            EffectCache(effect_cache) if effect_cache > 0 else None
+        )
+        self._effect_cache_sid: int | None = None
 
         self._state: dict[str, dict[str, Any]] = dict()
 
@@ -67,10 +133,26 @@ class AIOChroma:
                 self._state[target]["color"] = DEFAULT_COLOR
                 self._state[target]["state"] = True
 
-        self._state_keyboard: list[list[int]] = [
-            [0 for i in range(CHROMA_KEYBOARD_WIDTH)]
-            for j in range(CHROMA_KEYBOARD_HEIGHT)
-        ]
+        # Per-LED state of all the targets
+        self._state_frames: dict[str, Frame] = {
+            target: Frame.for_target(target) for target in CHROMA_TARGETS
+        }
+        # Targets showing the per-LED state rather than a single color
+        self._state_custom: set[str] = set()
+
+        # Running effects. Any new command for the target preempts them
+        self._tasks: dict[str, asyncio.Task] = dict()
+        # State before the running effects which restore it when they end
+        self._origins: dict[str, _Snapshot] = dict()
+
+        # Open recorder of the sent frames
+        self._recorder: FrameRecorder | None = recorder
+
+        # State listeners are notified once per `debounce` with the latest state
+        self._debounce: float = debounce
+        self._listeners: dict[StateListener, frozenset[str] | None] = dict()
+        self._notify_pending: dict[str, asyncio.TimerHandle] = dict()
+        self._notified: dict[str, TargetState] = dict()
 
     async def async_initialize(
         self, targets: list[str], color: Color = DEFAULT_COLOR
@@ -98,6 +180,9 @@ class AIOChroma:
             await self.async_keep()
             await self.async_keep()
 
+            if self._heartbeat:
+                await self._connection.async_start_heartbeat(self._heartbeat)
+
         return self._connected
 
     async def async_keep(self) -> None:
@@ -108,9 +193,285 @@ class AIOChroma:
     async def async_disconnect(self) -> None:
         """Disconnect"""
 
+        await self.async_stop_effect()
+        await self._connection.async_flush()
+        if self._effect_cache is not None:
+            self._effect_cache.clear()
         await self._connection.async_disconnect()
         self._connected = False
 
+    async def async_close(self) -> None:
+        """Disconnect if connected and release the HTTP session
+
+        The session passed to the constructor is left open
+        """
+
+        if self._connection.connected:
+            try:
+                await self.async_disconnect()
+            except ChromaError as ex:
+                _LOGGER.debug(f"Cannot disconnect while closing: {ex!r}")
+
+        await self.async_stop_effect()
+        await self._connection.async_close()
+
+        # Deliver the final state instead of dropping it
+        for target, handle in list(self._notify_pending.items()):
+            handle.cancel()
+            self._notify(target)
+
+    async def _async_send(
+        self,
+        target: str,
+        payload: bytes,
+        interval: float = DEFAULT_SLEEP,
+        endpoint: str | None = None,
+        commit: Callable[[], None] | None = None,
+        stream: bool = False,
+    ) -> bool:
+        """Send effect payload to the target
+
+        Payload equal to the one already applied is not sent (nor spaced).
+        `commit` saves the state once the SDK has applied the payload.
+        In pacing mode, the response to a `stream` frame is not waited for.
+        Returns `False` if the payload was superseded by a newer one
+        """
+
+        if endpoint is None:
+            endpoint = target
+
+        if self._is_applied(target, payload):
+            if commit is not None:
+                commit()
+            return True
+
+        try:
+            # Only the latest payload per target is sent
+            if self._coalesce:
+                result = await self._connection.async_put_latest(
+                    endpoint=endpoint, payload=payload, interval=interval, key=target
+                )
+                if result is None:
+                    return False
+
+            # In pacing mode, the response to a streamed frame is awaited while
+            # the next one is built. Its failure is logged, the state is saved
+            # on success only. Other effects wait for their response
+            elif self._connection.pacing:
+                in_flight = await self._connection.async_submit(
+                    endpoint=endpoint, payload=payload, interval=interval
+                )
+                if stream:
+                    in_flight.add_done_callback(
+                        partial(self._confirm, target, payload, commit)
+                    )
+                    return True
+                await in_flight
+
+            else:
+                await self._connection.async_put(
+                    endpoint=endpoint, payload=payload, interval=interval
+                )
+        except Exception:
+            self._forget(target)
+            raise
+
+        self._mark_applied(target, payload)
+        if commit is not None:
+            commit()
+        return True
+
+    def _confirm(
+        self,
+        target: str,
+        payload: bytes,
+        commit: Callable[[], None] | None,
+        in_flight: asyncio.Future,
+    ) -> None:
+        """Save the state after the response to the submitted payload"""
+
+        if in_flight.cancelled() or in_flight.exception() is not None:
+            self._forget(target)
+            if not in_flight.cancelled():
+                _LOGGER.warning(
+                    f"Effect on `{target}` failed: {in_flight.exception()!r}"
+                )
+            return
+
+        self._mark_applied(target, payload)
+        if commit is not None:
+            commit()
+
+    def _is_applied(self, target: str, payload: bytes) -> bool:
+        """Check if the payload is already applied to the target
+
+        Effects applied by ID without a device (`URL_EFFECT`) are always sent
+        """
+
+        if not self._skip_unchanged or target not in CHROMA_TARGETS:
+            return False
+
+        # Nothing is known about a new SDK session
+        if self._applied_sid != self._connection.sid:
+            self._applied.clear()
+            self._applied_sid = self._connection.sid
+
+        if self._applied.get(target) != payload:
+            return False
+
+        self._elided[target] = self._elided.get(target, 0) + 1
+        return True
+
+    def _forget(self, target: str) -> None:
+        """Forget the payload applied to the target"""
+
+        # An effect applied by ID may have reached any device
+        if target not in CHROMA_TARGETS:
+            self._applied.clear()
+            return
+
+        self._applied.pop(target, None)
+
+    def _mark_applied(self, target: str, payload: bytes) -> None:
+        """Remember the payload applied to the target"""
+
+        if not self._skip_unchanged:
+            return
+
+        if self._applied_sid != self._connection.sid:
+            self._applied.clear()
+            self._applied_sid = self._connection.sid
+
+        if target not in CHROMA_TARGETS:
+            self._forget(target)
+            return
+
+        self._applied[target] = payload
+
+    async def _async_send_cached(
+        self,
+        target: str,
+        payload: bytes,
+        interval: float = DEFAULT_SLEEP,
+        commit: Callable[[], None] | None = None,
+        stream: bool = False,
+    ) -> bool:
+        """Send effect payload to the target as a pre-created effect"""
+
+        effect_id = await self._async_cached_effect(target, payload)
+
+        return await self._async_send(
+            target=target,
+            payload=self._encoder.dumps({CHROMA_ID: effect_id}),
+            interval=interval,
+            endpoint=URL_EFFECT,
+            commit=commit,
+            stream=stream,
+        )
+
+    async def _async_cached_effect(self, target: str, payload: bytes) -> str:
+        """Get ID of the pre-created effect, creating it if needed"""
+
+        cache = self._effect_cache
+
+        # Effects do not survive the SDK session
+        if self._effect_cache_sid != self._connection.sid:
+            cache.clear()
+
+        key = (target, payload)
+        effect_id = cache.get(key)
+        if effect_id is None:
+            effect_id = await self.async_create_effect(target=target, payload=payload)
+            self._effect_cache_sid = self._connection.sid
+            evicted = cache.put(key, effect_id)
+            if evicted:
+                await self.async_delete_effect(evicted)
+
+        return effect_id
+
+    def _payload_custom(
+        self, effect: Frame | list, target: str = KEY_KEYBOARD
+    ) -> bytes:
+        """Payload of the custom effect"""
+
+        # Frames of the periodic effects keep their payloads
+        if isinstance(effect, Frame):
+            return effect.to_payload(CHROMA_CUSTOM[target], self._encoder.name)
+
+        return self._encoder.dumps(
+            {CHROMA_EFFECT: CHROMA_CUSTOM[target], CHROMA_PARAM: effect}
+        )
+
+    def _as_frame(self, target: str, effect: Frame | list) -> Frame:
+        """Check the geometry of the custom effect and convert it to a frame"""
+
+        if not isinstance(effect, Frame):
+            try:
+                if effect and isinstance(effect[0], (list, tuple)):
+                    effect = type(Frame.for_target(target)).from_grid(effect)
+                else:
+                    effect = Frame(1, len(effect), effect)
+            except (TypeError, ValueError) as ex:
+                raise ChromaWrongParameter(
+                    f"Wrong effect `{effect}` for target `{target}`"
+                ) from ex
+
+        if effect.shape != CHROMA_GEOMETRY[target]:
+            raise ChromaWrongParameter(
+                f"Wrong geometry `{effect.shape}` for target `{target}`"
+            )
+
+        return effect
+
+    ### EFFECT IDS -->
+
+    async def async_create_effect(self, target: str, payload: bytes) -> str:
+        """Create effect on the SDK without applying it. Return effect ID"""
+
+        if target not in CHROMA_TARGETS:
+            raise ChromaUnknownTarget(target)
+
+        result = await self._connection.async_post(
+            endpoint=target, payload=payload, interval=0
+        )
+        if CHROMA_ID not in result:
+            raise ChromaError(f"Cannot create effect for `{target}`: {result}")
+
+        return result[CHROMA_ID]
+
+    async def async_apply_effect(
+        self,
+        effect_id: str,
+        target: str = URL_EFFECT,
+        interval: float = DEFAULT_SLEEP,
+    ) -> bool:
+        """Apply pre-created effect
+
+        `target` is the device the effect is for. It queues the request and
+        keys the skipping of unchanged effects. Without a device, the effect
+        is always sent and nothing is known about the devices afterwards
+        """
+
+        payload = self._encoder.dumps({CHROMA_ID: effect_id})
+
+        return await self._async_send(
+            target=target, payload=payload, interval=interval, endpoint=URL_EFFECT
+        )
+
+    async def async_delete_effect(self, effect_id: str | list[str]) -> None:
+        """Delete pre-created effects from the SDK"""
+
+        if isinstance(effect_id, str):
+            effect_id = [effect_id]
+
+        payload = self._encoder.dumps({CHROMA_IDS: effect_id})
+
+        await self._connection.async_delete(
+            endpoint=URL_EFFECT, payload=payload, interval=0
+        )
+
+    ### <-- EFFECT IDS
+
     ### EFFECTS -->
 
     async def async_effect_none(
@@ -121,16 +482,14 @@ class AIOChroma:
         if target not in CHROMA_TARGETS:
             raise ChromaUnknownTarget(target)
 
-        payload = json.dumps(
-            {
-                CHROMA_EFFECT: EFFECT_NONE,
-            }
-        )
+        await self._async_preempt(target)
 
-        await self._connection.async_put(
-            endpoint=target, payload=payload, interval=sleep
+        await self._async_send(
+            target=target,
+            payload=self._encoder.none(),
+            interval=sleep,
+            commit=partial(self._commit_none, target),
         )
-        await self.async_save_state(target=target, state=False)
 
     async def async_effect_color(
         self,
@@ -144,23 +503,18 @@ class AIOChroma:
         if target not in CHROMA_TARGETS:
             raise ChromaUnknownTarget(target)
 
+        await self._async_preempt(target)
+
         if not brightness:
             brightness = self._state[target]["brightness"]
         if not color:
             color = self._state[target]["color"]
 
-        payload = json.dumps(
-            {
-                CHROMA_EFFECT: EFFECT_STATIC,
-                CHROMA_PARAM: color.scale(brightness).as_int(),
-            }
-        )
-
-        await self._connection.async_put(
-            endpoint=target, payload=payload, interval=sleep
-        )
-        await self.async_save_state(
-            target=target, color=color, brightness=brightness, state=True
+        await self._async_send(
+            target=target,
+            payload=self._encoder.static(color.scale_int(brightness)),
+            interval=sleep,
+            commit=partial(self._commit_color, target, color, brightness),
         )
 
     async def async_effect_blink(
@@ -171,11 +525,28 @@ class AIOChroma:
         repeats: int = 1,
         spacing: float = DEFAULT_SPACING,
     ) -> None:
-        """Blink effect"""
+        """Blink effect
+
+        Runs as the effect of the target, preempted by any new command for it
+        """
 
         if target not in CHROMA_TARGETS:
             raise ChromaUnknownTarget(target)
 
+        await self._async_run_effect(
+            target, self._async_blink(target, color, brightness, repeats, spacing)
+        )
+
+    async def _async_blink(
+        self,
+        target: str,
+        color: Color | None,
+        brightness: int | None,
+        repeats: int,
+        spacing: float,
+    ) -> None:
+        """Blink the target"""
+
         while repeats:
             await self.async_effect_none(target=target, sleep=spacing)
             await self.async_effect_color(
@@ -187,63 +558,356 @@ class AIOChroma:
         await self.async_effect_none(target=target, sleep=spacing)
 
     async def async_effect_keyboard(
-        self, effect: list[list[int]], spacing: float = DEFAULT_SPACING
+        self,
+        effect: KeyboardFrame | list[list[int]],
+        spacing: float = DEFAULT_SPACING,
     ) -> None:
         """Keyboard by key effect"""
 
-        payload = json.dumps(
-            {
-                CHROMA_EFFECT: EFFECT_CUSTOM,
-                CHROMA_PARAM: effect,
-            }
+        frame = self._as_frame(KEY_KEYBOARD, effect)
+
+        await self._async_preempt(KEY_KEYBOARD)
+
+        await self._async_send_custom(
+            target=KEY_KEYBOARD,
+            payload=self._payload_custom(effect),
+            spacing=spacing,
+            commit=partial(
+                self._commit_frame,
+                KEY_KEYBOARD,
+                frame.copy() if frame is effect else frame,
+            ),
         )
-        await self._connection.async_put(
-            endpoint=KEY_KEYBOARD, payload=payload, interval=spacing
+
+    async def async_effect_custom(
+        self,
+        target: str,
+        effect: Frame | list,
+        spacing: float = DEFAULT_SPACING,
+        stream: bool = False,
+    ) -> None:
+        """Per-LED effect on any target
+
+        `effect` is a frame (see `Frame.for_target`), a list of rows or
+        a flat list for the single-row targets. A `stream` frame is one of
+        many (e.g. an animation): in pacing mode it returns once sent and
+        its failure is only logged
+        """
+
+        if target not in CHROMA_TARGETS:
+            raise ChromaUnknownTarget(target)
+
+        frame = self._as_frame(target, effect)
+
+        await self._async_preempt(target)
+
+        await self._async_send_custom(
+            target=target,
+            payload=self._payload_custom(frame, target),
+            spacing=spacing,
+            commit=partial(
+                self._commit_frame, target, frame.copy() if frame is effect else frame
+            ),
+            stream=stream,
         )
 
-        await self.async_save_state_keyboard(effect)
+    async def async_animate(
+        self,
+        target: str,
+        source: FrameSource,
+        fps: float = DEFAULT_FPS,
+        duration: float | None = None,
+    ) -> Animation:
+        """Play frame generator (see `generators`) on the target
 
-    ### <-- EFFECTS
+        Runs until the generator ends, `duration` passes, the task is
+        cancelled or a new command for the target preempts it
+        """
 
-    ### KEYBOARD -->
+        if target not in CHROMA_TARGETS:
+            raise ChromaUnknownTarget(target)
 
-    async def async_parse_message(self, message) -> list[str]:
-        """Parse message"""
+        animation = Animation(self, target, source, fps=fps, duration=duration)
+        await self._async_run_effect(target, animation.async_run())
+        return animation
+
+    async def _async_send_custom(
+        self,
+        target: str,
+        payload: bytes,
+        spacing: float = DEFAULT_SPACING,
+        commit: Callable[[], None] | None = None,
+        stream: bool = False,
+    ) -> bool:
+        """Send custom effect payload"""
+
+        if self._effect_cache is not None:
+            return await self._async_send_cached(
+                target=target,
+                payload=payload,
+                interval=spacing,
+                commit=commit,
+                stream=stream,
+            )
+
+        return await self._async_send(
+            target=target,
+            payload=payload,
+            interval=spacing,
+            commit=commit,
+            stream=stream,
+        )
 
-        key_sp = dict()
-        keys = list()
+    async def async_apply_scene(
+        self,
+        scene: dict[str, Color | Frame | list | None],
+        brightness: int | None = None,
+        sleep: float = DEFAULT_SLEEP,
+    ) -> None:
+        """Apply effects to several targets at once
+
+        Each target gets a `Color` for the static effect, `None` to turn
+        it off or a frame (grid) for the custom effect
+        """
+
+        requests: dict[str, tuple[str, bytes]] = dict()
+        scene = dict(scene)
+        for target, effect in scene.items():
+            if target not in CHROMA_TARGETS:
+                raise ChromaUnknownTarget(target)
+
+            if effect is None:
+                requests[target] = (target, self._encoder.none())
+            elif isinstance(effect, Color):
+                level = brightness or self._state[target]["brightness"]
+                requests[target] = (
+                    target,
+                    self._encoder.static(effect.scale_int(level)),
+                )
+            elif isinstance(effect, (Frame, list)):
+                frame = self._as_frame(target, effect)
+                effect = scene[target] = frame.copy() if frame is effect else frame
+                payload = self._payload_custom(effect, target)
+                if self._effect_cache is not None:
+                    effect_id = await self._async_cached_effect(target, payload)
+                    requests[target] = (
+                        URL_EFFECT,
+                        self._encoder.dumps({CHROMA_ID: effect_id}),
+                    )
+                else:
+                    requests[target] = (target, payload)
+            else:
+                raise ChromaWrongParameter(
+                    f"Wrong effect `{effect}` for target `{target}`"
+                )
+
+        for target in scene:
+            await self._async_preempt(target)
 
-        # Find special keys
-        for match in KEYREG.finditer(message):
-            key_sp[match.start()] = match.group()
+        # Skip the targets which already have the effect
+        changed = [
+            target
+            for target, (_, payload) in requests.items()
+            if not self._is_applied(target, payload)
+        ]
+
+        results = dict(
+            zip(
+                changed,
+                await self._connection.async_put_batch(
+                    requests=[requests[target] for target in changed], interval=sleep
+                ),
+            )
+        )
 
-        # List the sequence of keys to use
-        i = 0
-        while i < len(message):
-            if i in key_sp:
-                keys.append(key_sp[i].replace("{", "").replace("}", ""))
-                i += len(key_sp[i])
+        # Save the state of all the changed targets at once
+        error = None
+        for target, effect in scene.items():
+            result = results.get(target)
+            if isinstance(result, Exception):
+                self._forget(target)
+                error = error or result
+                continue
+            if target in results:
+                self._mark_applied(target, requests[target][1])
+
+            if effect is None:
+                self._commit_none(target)
+            elif isinstance(effect, Color):
+                self._commit_color(
+                    target, effect, brightness or self._state[target]["brightness"]
+                )
             else:
-                keys.append(message[i])
-                i += 1
+                self._commit_frame(target, effect)
+
+        if error is not None:
+            raise error
+
+    ### <-- EFFECTS
+
+    def _commit_none(self, target: str) -> None:
+        """Save and record the target turned off"""
+
+        self._save_state(target=target, state=False)
+        if self._recorder is not None:
+            self._recorder.none(target)
+
+    def _commit_color(self, target: str, color: Color, brightness: int) -> None:
+        """Save and record the static effect of the target"""
+
+        self._save_state(target=target, color=color, brightness=brightness, state=True)
+        if self._recorder is not None:
+            self._recorder.static(target, color.scale_int(brightness))
+
+    def _commit_frame(self, target: str, frame: Frame) -> None:
+        """Save and record the custom effect of the target
+
+        The frame is kept as the state, it must not be used elsewhere
+        """
+
+        self._set_state_frame(target, frame)
+        self._record_frame(target)
+
+    def _record_frame(self, target: str) -> None:
+        """Record the per-LED state of the target if recording"""
+
+        if self._recorder is not None:
+            self._recorder.frame(target, self._state_frames[target])
+
+    ### TASKS -->
+
+    async def _async_run_effect(
+        self,
+        target: str,
+        effect: Awaitable[None],
+        origin: _Snapshot | None = None,
+    ) -> bool:
+        """Run effect as the managed task of the target
+
+        `origin` is the state the effect restores when it ends.
+        Returns `False` if the effect was preempted
+        """
+
+        await self._async_preempt(target)
+
+        # Registered before the next await, so it is preempted by any later command
+        task = asyncio.ensure_future(effect)
+        self._tasks[target] = task
+        if origin is not None:
+            self._origins[target] = origin
+        try:
+            # Preempting the effect does not cancel the caller
+            await asyncio.wait((task,))
+        except asyncio.CancelledError:
+            task.cancel()
+            raise
+        finally:
+            if self._tasks.get(target) is task:
+                del self._tasks[target]
+                self._origins.pop(target, None)
+
+        if task.cancelled():
+            _LOGGER.debug(f"Effect on `{target}` preempted")
+            return False
+
+        task.result()
+        return True
+
+    async def _async_preempt(self, target: str) -> None:
+        """Cancel the running effect of the target
+
+        Returns when no other effect is running, so the caller can start its
+        own before the next await. Effects started by concurrent commands
+        while waiting are preempted as well
+        """
+
+        while True:
+            task = self._tasks.get(target)
+            if task is None or task.done() or task is asyncio.current_task():
+                return
+
+            task.cancel()
+            await asyncio.wait((task,))
+
+    async def async_stop_effect(self, target: str | None = None) -> None:
+        """Stop the running effect of the target or all the targets"""
+
+        for name in [target] if target is not None else list(self._tasks):
+            await self._async_preempt(name)
+
+    def _origin(self, target: str) -> _Snapshot:
+        """State to restore after a new effect on the target
+
+        An effect preempting another restoring one restores the state from
+        before the first, not the frame the first was interrupted at
+        """
+
+        task = self._tasks.get(target)
+        if task is not None and not task.done() and target in self._origins:
+            return self._origins[target]
+
+        return self._snapshot(target)
+
+    def _snapshot(self, target: str) -> _Snapshot:
+        """Take snapshot of the target state"""
+
+        return _Snapshot(
+            target=target,
+            state=dict(self._state[target]),
+            frame=self._state_frames[target].copy(),
+            custom=target in self._state_custom,
+        )
+
+    async def _async_restore(
+        self, snapshot: _Snapshot, sleep: float = DEFAULT_SLEEP
+    ) -> None:
+        """Restore the target state from the snapshot"""
+
+        _LOGGER.debug(f"Restoring `{snapshot.target}` state: {snapshot.state}")
+
+        if not snapshot.state["state"]:
+            await self.async_effect_none(target=snapshot.target, sleep=sleep)
+        elif snapshot.custom:
+            await self.async_effect_custom(
+                target=snapshot.target, effect=snapshot.frame, spacing=sleep
+            )
+        else:
+            await self.async_effect_color(
+                target=snapshot.target,
+                color=snapshot.state["color"],
+                brightness=snapshot.state["brightness"],
+                sleep=sleep,
+            )
 
-        return keys
+    ### <-- TASKS
+
+    ### KEYBOARD -->
+
+    async def async_parse_message(self, message) -> list[str]:
+        """Parse message"""
+
+        return list(parse_message(message))
 
     async def async_set_keyboard_key(
         self,
-        effect: list[list[int]],
+        effect: KeyboardFrame | list[list[int]],
         keys: list[str] | str,
         color: Color,
         brightness: int | None = None,
-    ) -> list[list[int]]:
+    ) -> KeyboardFrame | list[list[int]]:
         """Set keyboard key value"""
 
         if type(keys) == str:
             keys = [keys]
 
-        for item in keys:
-            code = KEY_CODES[item]
-            effect[code.row][code.column] = color.scale(brightness).as_int()
+        value = color.as_int() if brightness is None else color.scale_int(brightness)
+
+        if isinstance(effect, Frame):
+            return effect.set_keys(key_indices(keys, self._keymap), value)
+
+        for index in key_indices(keys, self._keymap):
+            row, column = divmod(index, CHROMA_KEYBOARD_WIDTH)
+            effect[row][column] = value
 
         return effect
 
@@ -251,91 +915,101 @@ class AIOChroma:
         self,
         message: str,
         color: Color = DEFAULT_COLOR,
-        background: int = 0,
+        background: Color | int = 0,
         brightness: int | None = None,
         tail: int = 0,
         repeats: int = 1,
         spacing: float = DEFAULT_SPACING,
         sleep: float = DEFAULT_SLEEP,
     ) -> None:
-        """Send a key sequence"""
+        """Send a key sequence
+
+        Runs as the effect of the keyboard, preempted by any new command for it.
+        `sleep` spaces setting the background and restoring the previous state
+        """
 
         _LOGGER.debug(
             f"Starting `keyboard_seqyence` with message=`{message}`, color=`{color}`, background=`{background}`, brightness=`{brightness}`, tail=`{tail}`, repeats=`{repeats}`, spacing=`{spacing}`, sleep=`{sleep}`"
         )
 
-        # Get previous keyboard state
-        was = self._state["keyboard"].copy()
+        # Taken before the running effect is preempted
+        was = self._origin(KEY_KEYBOARD)
         _LOGGER.debug(f"Previous keyboard state: {was}")
 
-        # Parse the message
-        keys = await self.async_parse_message(message)
-
-        # Set background
-        await self.async_effect_color(
-            target=KEY_KEYBOARD, color=background, brightness=brightness
+        await self._async_run_effect(
+            KEY_KEYBOARD,
+            self._async_sequence(
+                message,
+                color,
+                background,
+                brightness,
+                tail,
+                repeats,
+                spacing,
+                sleep,
+                was,
+            ),
+            origin=was,
         )
 
-        length = len(keys)
-        # Don't allow tail longer than message
-        if tail >= length:
-            tail = length - 1
-        while repeats:
-            el = 0
-
-            while el < length:
-                effect = self._state_keyboard
-                if keys[el] in self._layout:
-                    # Turn off tail end
-                    rudiment = el - tail - 1
-                    if rudiment < length:
-                        effect = await self.async_set_keyboard_key(
-                            effect=effect,
-                            keys=self._layout[keys[rudiment]],
-                            color=background,
-                            brightness=brightness,
-                        )
-                    effect = await self.async_set_keyboard_key(
-                        effect=effect,
-                        keys=self._layout[keys[el]],
-                        color=color,
-                        brightness=brightness,
-                    )
-                else:
-                    _LOGGER.warning(f"Key '{keys[el]}' is unknown")
-                    continue
-
-                await self.async_effect_keyboard(effect=effect, spacing=spacing)
-
-                el += 1
-
-            repeats -= 1
+    async def _async_sequence(
+        self,
+        message: str,
+        color: Color,
+        background: Color | int,
+        brightness: int | None,
+        tail: int,
+        repeats: int,
+        spacing: float,
+        sleep: float,
+        was: _Snapshot,
+    ) -> None:
+        """Play key sequence on the keyboard and restore the state `was`"""
 
-            # Get rid of the tail in the end
-            if repeats < 1:
-                while el < length + tail + 1:
-                    # Turn off tail end
-                    rudiment = el - tail - 1
-                    if rudiment > -1:
-                        effect = await self.async_set_keyboard_key(
-                            effect=effect,
-                            keys=self._layout[keys[rudiment]],
-                            color=background,
-                            brightness=brightness,
-                        )
-
-                    await self.async_effect_keyboard(effect=effect, spacing=spacing)
-
-                    el += 1
-
-        # Recover previous state
-        _LOGGER.debug(f"Recovering keyboard state: {was}")
-        if was["state"]:
+        # Preempted sequence leaves the state to the new command
+        preempted = False
+        try:
+            # Set background
             await self.async_effect_color(
-                target="keyboard", color=was["color"], brightness=was["brightness"]
+                target=KEY_KEYBOARD,
+                color=(
+                    Color.from_int(background)
+                    if isinstance(background, int)
+                    else background
+                ),
+                brightness=brightness,
+                sleep=sleep,
             )
-        else:
-            await self.async_effect_none(target="keyboard")
+
+            # Frames are compiled once per message and style
+            sequence = compile_sequence(
+                message,
+                self._layout_name,
+                color,
+                background,
+                tail,
+                brightness,
+                self._encoder.name,
+            )
+            for frame in sequence.frames(repeats):
+                # A frame rejected by the SDK or stalled does not stop the sequence
+                try:
+                    await self._async_send_custom(
+                        target=KEY_KEYBOARD,
+                        payload=frame.payload,
+                        spacing=spacing,
+                        commit=partial(self._commit_frame, KEY_KEYBOARD, frame.frame()),
+                        stream=True,
+                    )
+                except (ChromaResultError, ChromaTimeout) as ex:
+                    _LOGGER.debug(f"Sequence frame dropped: {ex!r}")
+        except asyncio.CancelledError:
+            preempted = True
+            raise
+        finally:
+            # Recover previous state
+            if not preempted:
+                await self._async_restore(was, sleep)
 
     ### <-- KEYBOARD
 
@@ -396,8 +1070,9 @@ class AIOChroma:
     async def async_get_state(self, target: str = "") -> bool:
         """Get state of the target"""
 
-        # Keep alive if asking
-        await self.async_keep()
+        # Keep alive if asking. The managed heartbeat does it by itself
+        if not self._connection.heartbeat:
+            await self.async_keep()
 
         if target == str():
             return self._state
@@ -416,6 +1091,17 @@ class AIOChroma:
     ) -> None:
         """Save state of the target"""
 
+        self._save_state(target, color, brightness, state)
+
+    def _save_state(
+        self,
+        target: str,
+        color: Color | None = None,
+        brightness: int | None = None,
+        state: bool | None = None,
+    ) -> None:
+        """Save state of the target"""
+
         if not target in CHROMA_TARGETS:
             raise ChromaUnknownTarget(target)
 
@@ -424,6 +1110,7 @@ class AIOChroma:
                 raise ValueError(f"Wrong color `{color}` of type `{type(color)}`")
             self._state[target]["color"] = color
             self._state[target]["state"] = True
+            self._state_custom.discard(target)
 
         if brightness:
             if type(brightness) != int:
@@ -438,27 +1125,133 @@ class AIOChroma:
                 raise ValueError(f"Wrong state `{state}` of type `{type(state)}`")
             self._state[target]["state"] = state
 
-    async def async_save_state_keyboard(self, state: list[list[int]] | int = 0) -> None:
+        self._changed(target)
+
+    async def async_save_state_keyboard(
+        self, state: KeyboardFrame | list[list[int]] | int = 0
+    ) -> None:
         """Save state of target"""
 
-        if (
-            type(state) == list
-            and len(state) == CHROMA_KEYBOARD_HEIGHT
-            and type(state[0]) == list
-            and len(state[0]) == CHROMA_KEYBOARD_WIDTH
-        ):
-            self._state_keyboard = state
-            return
+        await self.async_save_state_frame(KEY_KEYBOARD, state)
+
+    async def async_save_state_frame(
+        self, target: str, state: Frame | list | int = 0
+    ) -> None:
+        """Save per-LED state of the target"""
+
+        if not target in CHROMA_TARGETS:
+            raise ChromaUnknownTarget(target)
 
         # Save the color
         if type(state) == int:
-            self._state_keyboard = [
-                [state for i in range(CHROMA_KEYBOARD_WIDTH)]
-                for j in range(CHROMA_KEYBOARD_HEIGHT)
-            ]
-        else:
+            self._state_frames[target].fill(state)
+            self._changed(target)
+            return
+
+        if not isinstance(state, (Frame, list)):
             raise ValueError(f"Wrong value `{state}` of type `{type(state)}`")
 
+        try:
+            frame = self._as_frame(target, state)
+        except ChromaWrongParameter as ex:
+            raise ValueError(f"Wrong value `{state}` for target `{target}`") from ex
+
+        if frame is state and frame is not self._state_frames[target]:
+            frame = frame.copy()
+        self._set_state_frame(target, frame)
+
+    def _set_state_frame(self, target: str, frame: Frame) -> None:
+        """Save the frame as the per-LED state of the target"""
+
+        self._state_frames[target] = frame
+        self._state_custom.add(target)
+        if target in self._state:
+            self._state[target]["state"] = True
+
+        self._changed(target)
+
+    def state(self, target: str) -> TargetState:
+        """Immutable state of the target. Doesn't talk to the SDK"""
+
+        if not target in self._state:
+            raise ChromaUnknownTarget(target)
+
+        state = self._state[target]
+        return TargetState(
+            target=target,
+            state=state["state"],
+            color=state["color"],
+            brightness=state["brightness"],
+            values=(
+                tuple(self._state_frames[target].data.tolist())
+                if target in self._state_custom
+                else None
+            ),
+        )
+
+    def subscribe(
+        self, listener: StateListener, targets: Iterable[str] | None = None
+    ) -> Callable[[], None]:
+        """Call the listener with the new state of the targets on every change
+
+        Bursts of changes (e.g. animations) are debounced: the listener gets the
+        latest state at most once per `debounce` for each target. Returns
+        the function to unsubscribe
+        """
+
+        if targets is not None:
+            targets = frozenset(targets)
+            for target in targets:
+                if not target in CHROMA_TARGETS:
+                    raise ChromaUnknownTarget(target)
+
+        self._listeners[listener] = targets
+
+        def unsubscribe() -> None:
+            self._listeners.pop(listener, None)
+
+        return unsubscribe
+
+    def _changed(self, target: str) -> None:
+        """Schedule notification of the listeners about the target"""
+
+        if (
+            not self._listeners
+            or target not in self._state
+            or target in self._notify_pending
+        ):
+            return
+
+        self._notify_pending[target] = asyncio.get_running_loop().call_later(
+            self._debounce, self._notify, target
+        )
+
+    def _notify(self, target: str) -> None:
+        """Notify the listeners about the target if its state has changed"""
+
+        self._notify_pending.pop(target, None)
+
+        state = self.state(target)
+        if self._notified.get(target) == state:
+            return
+        self._notified[target] = state
+
+        for listener, targets in list(self._listeners.items()):
+            if targets is not None and target not in targets:
+                continue
+            try:
+                listener(state)
+            except Exception:
+                _LOGGER.exception(f"Error in the state listener of `{target}`")
+
+    async def async_get_frame(self, target: str) -> Frame:
+        """Get a copy of the per-LED state of the target"""
+
+        if not target in CHROMA_TARGETS:
+            raise ChromaUnknownTarget(target)
+
+        return self._state_frames[target].copy()
+
     ### <-- STATES
 
     @property
@@ -467,6 +1260,42 @@ class AIOChroma:
 
         return self._connection.identity
 
+    @property
+    def coalesced(self) -> dict[str, int]:
+        """Number of superseded payloads by target"""
+
+        return self._connection.coalesced
+
+    @property
+    def elided(self) -> dict[str, int]:
+        """Number of skipped no-op requests by target"""
+
+        return self._elided.copy()
+
+    @property
+    def recorder(self) -> FrameRecorder | None:
+        """Recorder of the sent frames"""
+
+        return self._recorder
+
+    @recorder.setter
+    def recorder(self, recorder: FrameRecorder | None) -> None:
+        """Start recording with an open recorder or stop with `None`"""
+
+        self._recorder = recorder
+
+    @property
+    def running(self) -> list[str]:
+        """Targets with a running effect"""
+
+        return [target for target, task in self._tasks.items() if not task.done()]
+
+    @property
+    def tick(self) -> int | None:
+        """Last heartbeat tick"""
+
+        return self._connection.tick
+
     @property
     def connected(self) -> bool:
         """Connection state"""
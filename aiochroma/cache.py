@@ -0,0 +1,58 @@
+"""Cache module"""
+
+from __future__ import annotations
+
+from collections import OrderedDict
+from typing import Hashable
+
+from .const import DEFAULT_EFFECT_CACHE_SIZE
+
+
+class EffectCache:
+    """LRU cache of effects created on the Chroma SDK"""
+
+    def __init__(self, size: int = DEFAULT_EFFECT_CACHE_SIZE):
+        """Initialize cache"""
+
+        if size < 1:
+            raise ValueError(f"Wrong cache size `{size}`")
+
+        self._size = size
+        self._effects: OrderedDict[Hashable, str] = OrderedDict()
+
+    def get(self, key: Hashable) -> str | None:
+        """Get effect ID and mark it as recently used"""
+
+        effect_id = self._effects.get(key)
+        if effect_id is not None:
+            self._effects.move_to_end(key)
+        return effect_id
+
+    def put(self, key: Hashable, effect_id: str) -> list[str]:
+        """Save effect ID. Return IDs of the evicted effects"""
+
+        self._effects[key] = effect_id
+        self._effects.move_to_end(key)
+
+        evicted = list()
+        while len(self._effects) > self._size:
+            evicted.append(self._effects.popitem(last=False)[1])
+        return evicted
+
+    def clear(self) -> list[str]:
+        """Remove all the effects. Return their IDs"""
+
+        effect_ids = list(self._effects.values())
+        self._effects.clear()
+        return effect_ids
+
+    def __len__(self) -> int:
+        """Number of cached effects"""
+
+        return len(self._effects)
+
+    @property
+    def size(self) -> int:
+        """Maximum number of cached effects"""
+
+        return self._size
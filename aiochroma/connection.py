@@ -3,17 +3,79 @@
 from __future__ import annotations
 
 import asyncio
-import json
 import logging
+import random
+import re
 from typing import Any, Callable, Optional
 
 import aiohttp
 
-from aiochroma.const import CREDENTIALS, DEFAULT_PORT, DEFAULT_SLEEP, HEADERS, URL_MAIN
-from aiochroma.error import ChromaError, ChromaResultError
+from aiochroma.const import (
+    CREDENTIALS,
+    DEFAULT_BACKOFF,
+    DEFAULT_BACKOFF_MAX,
+    DEFAULT_CIRCUIT_RESET,
+    DEFAULT_CIRCUIT_THRESHOLD,
+    DEFAULT_HEARTBEAT,
+    DEFAULT_KEEPALIVE_TIMEOUT,
+    DEFAULT_LIMIT_PER_HOST,
+    DEFAULT_PORT,
+    DEFAULT_SLEEP,
+    DEFAULT_SPACING,
+    DEFAULT_TIMEOUTS,
+    HEADERS,
+    RESULT_INVALID_PARAMETER,
+    TIMEOUT_CONNECT,
+    TIMEOUT_FRAME,
+    TIMEOUT_HEARTBEAT,
+    TIMEOUT_IDENTIFY,
+    URL_MAIN,
+)
+from aiochroma.encoder import Encoder, get_encoder
+from aiochroma.error import (
+    ChromaCircuitOpen,
+    ChromaError,
+    ChromaPayloadError,
+    ChromaResultError,
+    ChromaSessionExpired,
+    ChromaTimeout,
+    ChromaTransportError,
+    ChromaWrongParameter,
+)
+from aiochroma.metrics import ChromaTrace
 
 _LOGGER = logging.getLogger(__name__)
 
+_SHORT_RESPONSE = re.compile(rb'\s*\{\s*"(result|tick)"\s*:\s*(-?\d+)\s*\}\s*')
+
+
+def create_session(
+    limit_per_host: int = DEFAULT_LIMIT_PER_HOST,
+    keepalive_timeout: float = DEFAULT_KEEPALIVE_TIMEOUT,
+) -> aiohttp.ClientSession:
+    """HTTP session tuned for the Chroma SDK
+
+    Connections are kept alive between the frames and reused, at most
+    `limit_per_host` per SDK port. The SDK is addressed by IP or a LAN name,
+    so DNS results are not cached. aiohttp sets TCP_NODELAY by itself
+    """
+
+    return aiohttp.ClientSession(
+        connector=aiohttp.TCPConnector(
+            limit=0,
+            limit_per_host=limit_per_host,
+            keepalive_timeout=keepalive_timeout,
+            use_dns_cache=False,
+        )
+    )
+
+
+def _log_failure(future: asyncio.Future) -> None:
+    """Log the error of a submitted request"""
+
+    if not future.cancelled() and future.exception() is not None:
+        _LOGGER.debug(f"Submitted request failed: {future.exception()!r}")
+
 
 class Connection:
     """AIOChroma connection"""
@@ -23,19 +85,67 @@ class Connection:
         host: str,
         port: int = DEFAULT_PORT,
         session: aiohttp.ClientSession | None = None,
+        pacing: bool = False,
+        trace: ChromaTrace | None = None,
+        encoder: Encoder | None = None,
+        timeouts: dict[str, float | None] | None = None,
+        retry: bool = False,
     ):
-        """Properties for connection"""
+        """Properties for connection
+
+        `timeouts` override the deadlines of the operations (see `DEFAULT_TIMEOUTS`),
+        `None` disables one. With `retry`, a frame PUT failed on the connection
+        is sent once more
+        """
 
         self._host = host
         self._port = port
-        self._session: aiohttp.ClientSession = (
-            session if session else aiohttp.ClientSession()
-        )
+
+        # Per-operation deadlines
+        timeouts = {**DEFAULT_TIMEOUTS, **(timeouts or {})}
+        for operation in timeouts:
+            if operation not in DEFAULT_TIMEOUTS:
+                raise ChromaWrongParameter(f"Unknown operation `{operation}`")
+        self._timeouts: dict[str, aiohttp.ClientTimeout] = {
+            operation: aiohttp.ClientTimeout(total=value)
+            for operation, value in timeouts.items()
+        }
+        self._retry: bool = retry
+
+        # Session created here is closed by `async_close`
+        self._owns_session: bool = session is None
+        self._session: aiohttp.ClientSession = session or create_session()
+
+        self._encoder: Encoder = encoder or get_encoder()
 
         self._identity: dict[str, str] = {}
         self._connected: bool = False
         self._sid: int | None = None
 
+        # Frame clock. In pacing mode `interval` is counted from the previous
+        # send instead of being slept after every response
+        self._pacing: bool = pacing
+        self._next_send: float = 0.0
+        self._in_flight: asyncio.Future | None = None
+
+        # Latest-frame-wins queues: one pending payload per endpoint
+        self._pending: dict[str, tuple[str, str | bytes, float, asyncio.Future]] = {}
+        self._senders: dict[str, asyncio.Task] = {}
+        self._coalesced: dict[str, int] = {}
+
+        # Managed heartbeat
+        self._heartbeat: asyncio.Task | None = None
+        self._last_sent: float = 0.0
+        self._tick: int | None = None
+
+        # Metrics hooks. Disabled when `None`
+        self._trace: ChromaTrace | None = trace
+
+        # Reconnects: one at a time, with backoff and a circuit breaker
+        self._reconnecting: asyncio.Future | None = None
+        self._failures: int = 0
+        self._circuit_until: float = 0.0
+
     ### ------------------------
     ### Service methods -->
     ### ------------------------
@@ -55,58 +165,210 @@ class Connection:
         self,
         endpoint: str,
         method: Callable,
-        payload: str = "",
+        payload: str | bytes = "",
         interval: float = DEFAULT_SLEEP,
+        paced: bool = True,
     ) -> dict[str, Any]:
         """Send a request"""
 
+        trace = self._trace
+
         # Check that we are connected
         if not self._connected and endpoint != URL_MAIN:
-            if not await self.async_connect():
-                raise ChromaError("Cannot connect to Chroma SDK")
+            await self._async_reconnect()
 
-        if self._sid is None:
-            url = f"http://{self._host}:{self._port}/{endpoint}"
-        else:
+        session_port = self._sid is not None and endpoint != URL_MAIN
+        if session_port:
             url = f"http://{self._host}:{self._sid}/chromasdk/{endpoint}"
+        else:
+            url = f"http://{self._host}:{self._port}/{endpoint}"
+
+        # Only frames take the slots of the frame clock
+        if self._pacing and paced and self._is_frame(endpoint, method):
+            await self.async_pace(interval)
+
+        self._last_sent = sent_at = asyncio.get_running_loop().time()
+        raw = b""
+        timeout = self._timeouts[self._operation(endpoint, method)]
 
         try:
             async with method(
-                url=url, headers=HEADERS, data=payload, ssl=False
+                url=url, headers=HEADERS, data=payload, ssl=False, timeout=timeout
             ) as response:
                 responce_status = response.status
                 if responce_status == 404:
-                    raise ChromaError("Chroma SDK is not available")
+                    if session_port:
+                        raise ChromaSessionExpired("Chroma SDK session expired")
+                    raise ChromaTransportError("Chroma SDK is not available")
+                # Error pages are not JSON
+                if responce_status != 200:
+                    raise ChromaTransportError(
+                        f"Chroma SDK responded with HTTP {responce_status}"
+                    )
 
-                # Debug: Get raw response text first
-                raw_text = await response.text()
-                _LOGGER.debug(f"Raw response for {endpoint}: {raw_text}")
-                
-                try:
-                    json_body = json.loads(raw_text)
-                except (json.JSONDecodeError, ValueError) as json_ex:
-                    _LOGGER.error(f"Failed to parse JSON response for {endpoint}: {raw_text}")
-                    raise ChromaError(f"Invalid JSON response from Chroma SDK: {raw_text}") from json_ex
+                raw = await response.read()
+                if _LOGGER.isEnabledFor(logging.DEBUG):
+                    _LOGGER.debug(f"Raw response for {endpoint}: {raw!r}")
+
+                json_body = self._decode(endpoint, raw)
 
                 if "result" in json_body and json_body["result"] != 0:
+                    if json_body["result"] == RESULT_INVALID_PARAMETER:
+                        raise ChromaPayloadError(json_body["result"])
                     raise ChromaResultError(json_body["result"])
 
-                await self.async_sleep(interval)
+                if trace is not None:
+                    self._trace_request(endpoint, method, payload, raw, sent_at)
+
+                if not self._pacing:
+                    await self.async_sleep(interval)
+                    if trace is not None:
+                        trace.on_sleep(interval)
 
                 return json_body
 
+        except ChromaError as ex:
+            # Only the lost session needs a reconnect
+            if isinstance(ex, ChromaSessionExpired):
+                self._mark_disconnected()
+            if trace is not None:
+                self._trace_request(endpoint, method, payload, raw, sent_at, ex)
+            raise
+
+        except asyncio.TimeoutError as ex:
+            if trace is not None:
+                self._trace_request(endpoint, method, payload, raw, sent_at, ex)
+            raise ChromaTimeout(
+                f"No response from the Chroma SDK in {timeout.total} s"
+            ) from ex
+
         except aiohttp.ClientConnectorError as ex:
-            self._mark_disconnected()
-            raise ChromaError("Cannot connect to the Chroma SDK") from ex
+            # Closed session port means the SDK dropped the session
+            if session_port:
+                self._mark_disconnected()
+            if trace is not None:
+                self._trace_request(endpoint, method, payload, raw, sent_at, ex)
+            if session_port:
+                raise ChromaSessionExpired("Chroma SDK session is closed") from ex
+            raise ChromaTransportError("Cannot connect to the Chroma SDK") from ex
+
+        except (aiohttp.ClientError, asyncio.TimeoutError, OSError) as ex:
+            if trace is not None:
+                self._trace_request(endpoint, method, payload, raw, sent_at, ex)
+            raise ChromaTransportError(
+                "Error communicating with the Chroma SDK"
+            ) from ex
+
+    @staticmethod
+    def _is_frame(endpoint: str, method: Callable) -> bool:
+        """Request sets an effect on the devices"""
+
+        return method.__name__ == "put" and endpoint not in (URL_MAIN, "heartbeat")
+
+    @staticmethod
+    def _operation(endpoint: str, method: Callable) -> str:
+        """Operation of the request to pick its deadline"""
+
+        if endpoint == URL_MAIN:
+            return TIMEOUT_IDENTIFY if method.__name__ == "get" else TIMEOUT_CONNECT
+        if endpoint == "heartbeat":
+            return TIMEOUT_HEARTBEAT
+        if endpoint == "":
+            return TIMEOUT_CONNECT
+        return TIMEOUT_FRAME
+
+    async def _async_reconnect(self) -> None:
+        """Re-create the SDK session
+
+        Concurrent requests share a single attempt. Failed attempts are
+        retried with exponential backoff and jitter, and after
+        `DEFAULT_CIRCUIT_THRESHOLD` failures in a row requests fail at once
+        for `DEFAULT_CIRCUIT_RESET` seconds
+        """
+
+        if self._reconnecting is not None:
+            await asyncio.shield(self._reconnecting)
+            if not self._connected:
+                raise ChromaTransportError("Cannot connect to Chroma SDK")
+            return
+
+        loop = asyncio.get_running_loop()
+        if loop.time() < self._circuit_until:
+            raise ChromaCircuitOpen(
+                f"Reconnects to {self._host} suspended after {self._failures} failures"
+            )
+
+        self._reconnecting = loop.create_future()
+        try:
+            if self._failures:
+                delay = min(
+                    DEFAULT_BACKOFF_MAX, DEFAULT_BACKOFF * 2 ** (self._failures - 1)
+                )
+                await asyncio.sleep(random.uniform(0, delay))
+
+            try:
+                connected = await self.async_connect()
+            except ChromaError as ex:
+                _LOGGER.debug(f"Reconnect to {self._host} failed: {ex!r}")
+                connected = False
+
+            if not connected:
+                self._failures += 1
+                if self._failures >= DEFAULT_CIRCUIT_THRESHOLD:
+                    _LOGGER.warning(
+                        f"Chroma SDK at {self._host} is not available. Retrying in {DEFAULT_CIRCUIT_RESET} s"
+                    )
+                    self._circuit_until = loop.time() + DEFAULT_CIRCUIT_RESET
+                raise ChromaTransportError("Cannot connect to Chroma SDK")
+
+            if self._trace is not None:
+                self._trace.on_reconnect()
+        finally:
+            self._reconnecting.set_result(None)
+            self._reconnecting = None
+
+    def _decode(self, endpoint: str, raw: bytes) -> dict[str, Any]:
+        """Decode response body"""
+
+        # Bodies with a single `result` or `tick` are not decoded completely
+        match = _SHORT_RESPONSE.match(raw)
+        if match is not None:
+            return {match.group(1).decode(): int(match.group(2))}
 
-        except Exception as ex:
-            self._mark_disconnected()
-            raise ChromaError("Error communicating with the Chroma SDK") from ex
+        try:
+            return self._encoder.loads(raw)
+        except ValueError as ex:
+            _LOGGER.error(f"Failed to parse JSON response for {endpoint}: {raw!r}")
+            raise ChromaError(f"Invalid JSON response from Chroma SDK: {raw!r}") from ex
+
+    def _trace_request(
+        self,
+        endpoint: str,
+        method: Callable,
+        payload: str | bytes,
+        raw: bytes,
+        sent_at: float,
+        error: Exception | None = None,
+    ) -> None:
+        """Report finished request to the trace"""
+
+        # A wrapped error is reported by its cause
+        if isinstance(error, ChromaError) and error.__cause__ is not None:
+            error = error.__cause__
+
+        self._trace.on_request(
+            endpoint,
+            method.__name__.upper(),
+            asyncio.get_running_loop().time() - sent_at,
+            len(payload),
+            len(raw),
+            error,
+        )
 
     async def async_delete(
         self,
         endpoint: str = "",
-        payload: str = "",
+        payload: str | bytes = "",
         interval: float = DEFAULT_SLEEP,
     ) -> dict[str, Any]:
         """Send DELETE request"""
@@ -118,7 +380,7 @@ class Connection:
     async def async_get(
         self,
         endpoint: str,
-        payload: str = "",
+        payload: str | bytes = "",
         interval: float = DEFAULT_SLEEP,
     ) -> dict[str, Any]:
         """Send GET request"""
@@ -128,7 +390,7 @@ class Connection:
     async def async_post(
         self,
         endpoint: str,
-        payload: str = "",
+        payload: str | bytes = "",
         interval: float = DEFAULT_SLEEP,
     ) -> dict[str, Any]:
         """Send POST request"""
@@ -138,12 +400,156 @@ class Connection:
     async def async_put(
         self,
         endpoint: str,
-        payload: str = "",
+        payload: str | bytes = "",
         interval: float = DEFAULT_SLEEP,
     ):
-        """Send PUT request"""
+        """Send PUT request
+
+        Frames are idempotent, so with `retry` one failed on the connection
+        is sent once more. A stalled one is not, its deadline is spent
+        """
+
+        try:
+            return await self.async_request(
+                endpoint, self._session.put, payload, interval
+            )
+        except ChromaTransportError as ex:
+            if (
+                not self._retry
+                or endpoint == "heartbeat"
+                or isinstance(ex, (ChromaCircuitOpen, ChromaTimeout))
+            ):
+                raise
+            _LOGGER.debug(f"Retrying {endpoint} after {ex!r}")
+
+        return await self.async_request(
+            endpoint, self._session.put, payload, interval, paced=False
+        )
+
+    async def async_put_batch(
+        self,
+        requests: list[tuple[str, str | bytes]],
+        interval: float = DEFAULT_SLEEP,
+    ) -> list[dict[str, Any] | Exception]:
+        """Send PUT requests concurrently
+
+        Each request is an `(endpoint, payload)` pair. The batch takes
+        a single slot of the frame clock. Failed requests are returned
+        as exceptions
+        """
+
+        await self.async_flush()
+
+        # Connect once for the whole batch
+        if not self._connected:
+            await self._async_reconnect()
+
+        if self._pacing:
+            await self.async_pace(interval)
+
+        return await asyncio.gather(
+            *(
+                self.async_request(
+                    endpoint, self._session.put, payload, interval, paced=False
+                )
+                for endpoint, payload in requests
+            ),
+            return_exceptions=True,
+        )
+
+    async def async_submit(
+        self,
+        endpoint: str,
+        payload: str | bytes = "",
+        interval: float = DEFAULT_SPACING,
+    ) -> asyncio.Future:
+        """Send PUT request without waiting for the response
 
-        return await self.async_request(endpoint, self._session.put, payload, interval)
+        Returns the future of the response, which gets the errors of this
+        request only. Failures nobody asks the future about are logged
+        """
+
+        # Only one request in flight
+        await self.async_flush()
+
+        in_flight = asyncio.ensure_future(self.async_put(endpoint, payload, interval))
+        in_flight.add_done_callback(_log_failure)
+        self._in_flight = in_flight
+        return in_flight
+
+    async def async_put_latest(
+        self,
+        endpoint: str,
+        payload: str | bytes = "",
+        interval: float = DEFAULT_SLEEP,
+        key: str | None = None,
+    ) -> dict[str, Any] | None:
+        """Send PUT request, dropping it if superseded before sending
+
+        Payloads are queued by `key` (the endpoint by default).
+        Returns `None` if the payload was replaced by a newer one
+        """
+
+        if key is None:
+            key = endpoint
+
+        future = asyncio.get_running_loop().create_future()
+
+        # Replace the pending payload
+        pending = self._pending.get(key)
+        if pending is not None:
+            self._coalesced[key] = self._coalesced.get(key, 0) + 1
+            if not pending[3].done():
+                pending[3].set_result(None)
+        self._pending[key] = (endpoint, payload, interval, future)
+
+        if key not in self._senders:
+            self._senders[key] = asyncio.ensure_future(self._async_send_latest(key))
+
+        return await future
+
+    async def _async_send_latest(self, key: str) -> None:
+        """Send pending payloads of the queue one by one"""
+
+        future = None
+        try:
+            while key in self._pending:
+                endpoint, payload, interval, future = self._pending.pop(key)
+                if future.done():
+                    continue
+                try:
+                    result = await self.async_put(endpoint, payload, interval)
+                except Exception as ex:
+                    if not future.done():
+                        future.set_exception(ex)
+                else:
+                    if not future.done():
+                        future.set_result(result)
+        except BaseException:
+            # Stopped sender (e.g. on close) leaves nobody to send the payloads
+            if future is not None and not future.done():
+                future.cancel()
+            self._cancel_pending(key)
+            raise
+        finally:
+            self._senders.pop(key, None)
+
+    def _cancel_pending(self, key: str) -> None:
+        """Cancel the payload waiting in the queue"""
+
+        pending = self._pending.pop(key, None)
+        if pending is not None and not pending[3].done():
+            pending[3].cancel()
+
+    async def async_flush(self) -> None:
+        """Wait for the submitted request to finish
+
+        Its result is left to the future returned by `async_submit`
+        """
+
+        in_flight, self._in_flight = self._in_flight, None
+        if in_flight is not None:
+            await asyncio.wait((in_flight,))
 
     ### <- SEND REQUESTS
 
@@ -152,6 +558,21 @@ class Connection:
 
         await asyncio.sleep(interval)
 
+    async def async_pace(self, interval: float = DEFAULT_SLEEP) -> None:
+        """Wait for the next slot of the frame clock"""
+
+        now = asyncio.get_running_loop().time()
+
+        # Reserve the slot before sleeping, so concurrent senders queue up.
+        # A late send restarts the clock instead of bursting to catch up
+        slot = max(self._next_send, now)
+        self._next_send = slot + interval
+
+        if slot > now:
+            await self.async_sleep(slot - now)
+            if self._trace is not None:
+                self._trace.on_sleep(slot - now)
+
     async def async_identify(self) -> None:
         """Identify Chroma API"""
 
@@ -171,33 +592,130 @@ class Connection:
         if "sessionid" in result:
             self._sid = int(result["sessionid"])
             self._connected = True
+            self._failures = 0
+            self._circuit_until = 0.0
             return True
         return False
 
     async def async_disconnect(self) -> None:
         """Disconnect from Chroma"""
 
-        await self.async_delete()
+        await self.async_stop_heartbeat()
+        try:
+            await self.async_delete()
+        finally:
+            self._mark_disconnected()
+
+    async def async_close(self) -> None:
+        """Stop all the background tasks and close the own session"""
+
+        await self.async_stop_heartbeat()
+        await self.async_flush()
+
+        # Callers of `async_put_latest` get their payloads cancelled
+        senders = list(self._senders.values())
+        for task in senders:
+            task.cancel()
+        if senders:
+            await asyncio.wait(senders)
+        for key in list(self._pending):
+            self._cancel_pending(key)
+
+        if self._owns_session and not self._session.closed:
+            await self._session.close()
 
-    async def async_keep(self) -> int:
+    async def async_keep(self, interval: float = DEFAULT_SLEEP) -> int:
         """Keep connection active"""
 
-        result = await self.async_put("heartbeat")
-        
-        # Debug: Log the actual result to see what we're getting
-        _LOGGER.debug(f"Heartbeat result: {result}")
-        
+        result = await self.async_put("heartbeat", interval=interval)
+
+        if _LOGGER.isEnabledFor(logging.DEBUG):
+            _LOGGER.debug(f"Heartbeat result: {result}")
+
         # Check if result is a dict before trying to access it
         if isinstance(result, dict):
             if "tick" in result:
-                return result["tick"]
+                self._tick = result["tick"]
+                return self._tick
             else:
                 _LOGGER.error(f"No 'tick' key in heartbeat response: {result}")
                 raise ChromaError("Invalid heartbeat response - missing 'tick' field")
         else:
-            _LOGGER.error(f"Heartbeat response is not a dict: {type(result)} - {result}")
+            _LOGGER.error(
+                f"Heartbeat response is not a dict: {type(result)} - {result}"
+            )
             raise ChromaError(f"Invalid heartbeat response type: {type(result)}")
 
+    ### HEARTBEAT -->
+
+    async def async_start_heartbeat(self, interval: float = DEFAULT_HEARTBEAT) -> None:
+        """Start sending heartbeats in the background"""
+
+        await self.async_stop_heartbeat()
+        self._heartbeat = asyncio.ensure_future(self._async_heartbeat(interval))
+
+    async def async_stop_heartbeat(self) -> None:
+        """Stop sending heartbeats"""
+
+        heartbeat, self._heartbeat = self._heartbeat, None
+        if heartbeat is None:
+            return
+
+        heartbeat.cancel()
+        try:
+            await heartbeat
+        except asyncio.CancelledError:
+            pass
+
+    async def _async_heartbeat(self, interval: float) -> None:
+        """Send heartbeat when nothing else was sent for `interval` seconds"""
+
+        loop = asyncio.get_running_loop()
+        while True:
+            # Any request keeps the session alive
+            idle = loop.time() - self._last_sent
+            if idle < interval:
+                await self.async_sleep(interval - idle)
+                continue
+
+            try:
+                await self.async_keep(interval=0)
+            except ChromaError as ex:
+                _LOGGER.warning(f"Heartbeat failed: {ex}")
+                await self.async_sleep(interval)
+
+    ### <-- HEARTBEAT
+
+    @property
+    def coalesced(self) -> dict[str, int]:
+        """Number of dropped payloads by endpoint"""
+
+        return self._coalesced.copy()
+
+    @property
+    def pacing(self) -> bool:
+        """Pacing mode"""
+
+        return self._pacing
+
+    @property
+    def trace(self) -> ChromaTrace | None:
+        """Metrics hooks"""
+
+        return self._trace
+
+    @property
+    def heartbeat(self) -> bool:
+        """Managed heartbeat is running"""
+
+        return self._heartbeat is not None and not self._heartbeat.done()
+
+    @property
+    def tick(self) -> int | None:
+        """Last heartbeat tick of the SDK"""
+
+        return self._tick
+
     @property
     def connected(self) -> bool:
         """Connection status"""
@@ -2,7 +2,9 @@
 
 from __future__ import annotations
 
-from dataclasses import dataclass
+from dataclasses import FrozenInstanceError, dataclass
+from functools import lru_cache
+from typing import Any, Iterable
 
 
 @dataclass
@@ -13,18 +15,29 @@ class Key:
     column: int
 
 
-@dataclass
 class Color:
     """Color class"""
 
-    r: int = 0
-    g: int = 0
-    b: int = 0
+    __slots__ = ("r", "g", "b", "_packed")
+
+    def __init__(self, r: int = 0, g: int = 0, b: int = 0):
+        """Initialize immutable color"""
+
+        object.__setattr__(self, "r", r)
+        object.__setattr__(self, "g", g)
+        object.__setattr__(self, "b", b)
+        object.__setattr__(self, "_packed", r + g * 256 + b * 65536)
+
+    @classmethod
+    def from_int(cls, value: int) -> Color:
+        """Create color from single-int number"""
+
+        return cls(value & 0xFF, (value >> 8) & 0xFF, (value >> 16) & 0xFF)
 
     def as_int(self):
         """Return single-int number"""
 
-        return self.r + self.g * 256 + self.b * 65536
+        return self._packed
 
     def brigtness(self) -> int:
         """Return maximum brightness in single channel"""
@@ -39,6 +52,143 @@ class Color:
                 round(self.r * scale), round(self.g * scale), round(self.b * scale)
             )
         elif type(scale) == int:
-            return self.scale(scale / 255)
+            table = brightness_table(scale)
+            return Color(table[self.r], table[self.g], table[self.b])
         else:
             raise ValueError(f"Unknown scale: `{scale}`")
+
+    def scale_int(self, brightness: int) -> int:
+        """Return single-int number of the color scaled to the brightness"""
+
+        table = brightness_table(brightness)
+        return table[self.r] + table[self.g] * 256 + table[self.b] * 65536
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        """Colors are immutable"""
+
+        raise FrozenInstanceError(f"cannot assign to field '{name}'")
+
+    def __delattr__(self, name: str) -> None:
+        """Colors are immutable"""
+
+        raise FrozenInstanceError(f"cannot delete field '{name}'")
+
+    def __eq__(self, other: object) -> bool:
+        """Compare colors"""
+
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        return self._packed == other._packed
+
+    def __hash__(self) -> int:
+        """Hash of the color"""
+
+        return hash(self._packed)
+
+    def __reduce__(self):
+        """Support copy and pickle"""
+
+        return (self.__class__, (self.r, self.g, self.b))
+
+    def __repr__(self) -> str:
+        """Color representation"""
+
+        return f"Color(r={self.r!r}, g={self.g!r}, b={self.b!r})"
+
+
+@lru_cache(maxsize=256)
+def brightness_table(brightness: int) -> tuple[int, ...]:
+    """Channel values 0-255 scaled to the brightness"""
+
+    ratio = brightness / 255
+    return tuple(round(value * ratio) for value in range(256))
+
+
+def pack_colors(colors: Iterable[Color]) -> list[int]:
+    """Convert colors to single-int numbers"""
+
+    return [color._packed for color in colors]
+
+
+def unpack_colors(values: Iterable[int]) -> list[Color]:
+    """Convert single-int numbers to colors"""
+
+    from_int = Color.from_int
+    return [from_int(value) for value in values]
+
+
+def scale_packed(values: Iterable[int], brightness: int) -> list[int]:
+    """Scale single-int colors to the brightness"""
+
+    table = brightness_table(brightness)
+    return [
+        table[value & 0xFF]
+        | table[(value >> 8) & 0xFF] << 8
+        | table[(value >> 16) & 0xFF] << 16
+        for value in values
+    ]
+
+
+class TargetState:
+    """Immutable state of a target passed to the state listeners"""
+
+    __slots__ = ("target", "state", "color", "brightness", "values")
+
+    def __init__(
+        self,
+        target: str,
+        state: bool,
+        color: Color,
+        brightness: int,
+        values: tuple[int, ...] | None = None,
+    ):
+        """Initialize state. `values` are the packed LED colors of a custom effect"""
+
+        object.__setattr__(self, "target", target)
+        object.__setattr__(self, "state", state)
+        object.__setattr__(self, "color", color)
+        object.__setattr__(self, "brightness", brightness)
+        object.__setattr__(self, "values", values)
+
+    @property
+    def custom(self) -> bool:
+        """Target shows per-LED colors rather than a single color"""
+
+        return self.values is not None
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        """States are immutable"""
+
+        raise FrozenInstanceError(f"cannot assign to field '{name}'")
+
+    def __delattr__(self, name: str) -> None:
+        """States are immutable"""
+
+        raise FrozenInstanceError(f"cannot delete field '{name}'")
+
+    def __eq__(self, other: object) -> bool:
+        """Compare states"""
+
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        return (
+            self.target == other.target
+            and self.state == other.state
+            and self.color == other.color
+            and self.brightness == other.brightness
+            and self.values == other.values
+        )
+
+    def __hash__(self) -> int:
+        """Hash of the state"""
+
+        return hash((self.target, self.state, self.color, self.brightness, self.values))
+
+    def __repr__(self) -> str:
+        """State representation"""
+
+        return (
+            f"TargetState(target={self.target!r}, state={self.state!r}, "
+            f"color={self.color!r}, brightness={self.brightness!r}, "
+            f"custom={self.custom!r})"
+        )
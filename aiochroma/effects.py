@@ -1 +1,147 @@
-"""Effects module"""
+"""Effects module
+
+Scheduler playing frame generators on a target at a fixed frame rate
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import math
+from typing import TYPE_CHECKING, AsyncIterable, Iterable, Union
+
+from .const import DEFAULT_FPS
+from .error import ChromaResultError, ChromaTimeout, ChromaWrongParameter
+from .frame import Frame
+
+if TYPE_CHECKING:
+    from .aiochroma import AIOChroma
+
+_LOGGER = logging.getLogger(__name__)
+
+FrameSource = Union[Iterable[Frame], AsyncIterable[Frame]]
+
+
+class Animation:
+    """Frame source played on a target at a fixed frame rate
+
+    Frames are pulled for the clock of the animation, which is sent to
+    the generators. When the SDK is slower than the frame rate, the missed
+    frames are dropped instead of delaying the animation. Cancel the task
+    running `async_run` to stop it at once
+    """
+
+    def __init__(
+        self,
+        chroma: AIOChroma,
+        target: str,
+        source: FrameSource,
+        fps: float = DEFAULT_FPS,
+        duration: float | None = None,
+    ):
+        """Initialize animation"""
+
+        if fps <= 0:
+            raise ChromaWrongParameter(f"Wrong `fps` value `{fps}`")
+
+        self._chroma = chroma
+        self._target = target
+        self._source = source
+        self._fps = fps
+        self._duration = duration
+
+        self._frames: int = 0
+        self._dropped: int = 0
+
+    async def async_run(self) -> None:
+        """Play the animation until the source ends, duration or cancel"""
+
+        loop = asyncio.get_running_loop()
+        fps = self._fps
+
+        is_async = hasattr(self._source, "__aiter__")
+        iterator = self._source.__aiter__() if is_async else iter(self._source)
+
+        start = loop.time()
+        tick = 0
+        last = math.ceil(self._duration * fps) if self._duration is not None else None
+        try:
+            while self._duration is None or tick / fps < self._duration:
+                # Frames are rendered for the nominal time of the tick
+                try:
+                    if is_async:
+                        frame = await self._async_next(iterator, tick / fps)
+                    else:
+                        frame = self._next(iterator, tick / fps)
+                except (StopIteration, StopAsyncIteration):
+                    break
+
+                # A frame rejected by the SDK or stalled does not stop the animation
+                try:
+                    await self._chroma.async_effect_custom(
+                        target=self._target, effect=frame, spacing=0, stream=True
+                    )
+                except (ChromaResultError, ChromaTimeout) as ex:
+                    _LOGGER.debug(f"Frame on `{self._target}` dropped: {ex!r}")
+                    self._dropped += 1
+                else:
+                    self._frames += 1
+
+                # Skip the ticks missed while sending
+                late = math.floor((loop.time() - start) * fps) + 1
+                if last is not None:
+                    late = min(late, last)
+                if late > tick + 1:
+                    self._dropped += late - tick - 1
+                    tick = late
+                else:
+                    tick += 1
+
+                await asyncio.sleep(max(start + tick / fps - loop.time(), 0))
+        finally:
+            close = getattr(iterator, "aclose" if is_async else "close", None)
+            if close is not None:
+                result = close()
+                if is_async:
+                    await result
+
+        _LOGGER.debug(
+            f"Animation on `{self._target}` finished: {self._frames} frames, {self._dropped} dropped"
+        )
+
+    @staticmethod
+    async def _async_next(iterator, clock: float) -> Frame:
+        """Pull the next frame, sending the clock to the async generators"""
+
+        if clock and hasattr(iterator, "asend"):
+            return await iterator.asend(clock)
+        return await iterator.__anext__()
+
+    @staticmethod
+    def _next(iterator, clock: float) -> Frame:
+        """Pull the next frame, sending the clock to the generators
+
+        Not a coroutine: `StopIteration` can't leave one
+        """
+
+        if clock and hasattr(iterator, "send"):
+            return iterator.send(clock)
+        return next(iterator)
+
+    @property
+    def target(self) -> str:
+        """Target of the animation"""
+
+        return self._target
+
+    @property
+    def frames(self) -> int:
+        """Number of frames sent"""
+
+        return self._frames
+
+    @property
+    def dropped(self) -> int:
+        """Number of frames dropped to keep up with the clock"""
+
+        return self._dropped
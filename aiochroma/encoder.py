@@ -0,0 +1,178 @@
+"""Encoder module
+
+JSON backends for the effect payloads and SDK responses. `orjson` or
+`ujson` are used when installed, the standard `json` otherwise. Custom
+grids of a fixed shape are written through a precompiled template
+"""
+
+from __future__ import annotations
+
+import json
+from functools import lru_cache
+from typing import Any, Sequence
+
+from .const import (
+    CHROMA_EFFECT,
+    CHROMA_PARAM,
+    EFFECT_CUSTOM,
+    EFFECT_NONE,
+    EFFECT_STATIC,
+)
+from .error import ChromaWrongParameter
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import ujson
+except ImportError:
+    ujson = None
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+ENCODER_JSON = "json"
+ENCODER_ORJSON = "orjson"
+ENCODER_UJSON = "ujson"
+
+
+@lru_cache(maxsize=None)
+def _template(shape: tuple[int, ...], effect: str) -> str:
+    """Printf-style template of the custom effect payload"""
+
+    if len(shape) == 1:
+        param = "[" + ",".join(["%d"] * shape[0]) + "]"
+    else:
+        rows, columns = shape
+        row = "[" + ",".join(["%d"] * columns) + "]"
+        param = "[" + ",".join([row] * rows) + "]"
+
+    return f'{{"{CHROMA_EFFECT}":"{effect}","{CHROMA_PARAM}":{param}}}'
+
+
+class Encoder:
+    """Standard `json` encoder"""
+
+    name = ENCODER_JSON
+
+    def dumps(self, obj: Any) -> bytes:
+        """Encode object"""
+
+        return json.dumps(obj, separators=(",", ":")).encode()
+
+    def loads(self, raw: bytes | str) -> Any:
+        """Decode object"""
+
+        return json.loads(raw)
+
+    ### PAYLOADS -->
+
+    def none(self) -> bytes:
+        """Payload of the none effect"""
+
+        return self.dumps({CHROMA_EFFECT: EFFECT_NONE})
+
+    def static(self, color: int) -> bytes:
+        """Payload of the static effect"""
+
+        return self.dumps({CHROMA_EFFECT: EFFECT_STATIC, CHROMA_PARAM: color})
+
+    def custom(
+        self,
+        values: Sequence[int],
+        shape: tuple[int, ...],
+        effect: str = EFFECT_CUSTOM,
+    ) -> bytes:
+        """Payload of the custom effect from flat packed colors"""
+
+        if np is not None and isinstance(values, np.ndarray):
+            values = values.tolist()
+
+        return (_template(shape, effect) % tuple(values)).encode()
+
+    ### <-- PAYLOADS
+
+
+class UjsonEncoder(Encoder):
+    """`ujson` encoder"""
+
+    name = ENCODER_UJSON
+
+    def dumps(self, obj: Any) -> bytes:
+        """Encode object"""
+
+        return ujson.dumps(obj).encode()
+
+    def loads(self, raw: bytes | str) -> Any:
+        """Decode object"""
+
+        return ujson.loads(raw)
+
+
+class OrjsonEncoder(Encoder):
+    """`orjson` encoder"""
+
+    name = ENCODER_ORJSON
+
+    def dumps(self, obj: Any) -> bytes:
+        """Encode object"""
+
+        return orjson.dumps(obj)
+
+    def loads(self, raw: bytes | str) -> Any:
+        """Decode object"""
+
+        return orjson.loads(raw)
+
+    def custom(
+        self,
+        values: Sequence[int],
+        shape: tuple[int, ...],
+        effect: str = EFFECT_CUSTOM,
+    ) -> bytes:
+        """Payload of the custom effect from flat packed colors"""
+
+        # Serialize NumPy buffers without converting them to lists
+        if np is not None and isinstance(values, np.ndarray):
+            return orjson.dumps(
+                {CHROMA_EFFECT: effect, CHROMA_PARAM: values.reshape(shape)},
+                option=orjson.OPT_SERIALIZE_NUMPY,
+            )
+
+        return super().custom(values, shape, effect)
+
+
+ENCODERS: dict[str, type[Encoder] | None] = {
+    ENCODER_ORJSON: OrjsonEncoder if orjson is not None else None,
+    ENCODER_UJSON: UjsonEncoder if ujson is not None else None,
+    ENCODER_JSON: Encoder,
+}
+
+
+@lru_cache(maxsize=None)
+def get_encoder(name: str | None = None) -> Encoder:
+    """Get encoder by name or the fastest one available"""
+
+    if name is None:
+        for encoder in ENCODERS.values():
+            if encoder is not None:
+                return encoder()
+
+    if name not in ENCODERS:
+        raise ChromaWrongParameter(f"Unknown encoder `{name}`")
+
+    encoder = ENCODERS[name]
+    if encoder is None:
+        raise ChromaWrongParameter(f"Encoder `{name}` is not installed")
+
+    return encoder()
+
+
+def available_encoders() -> list[str]:
+    """Names of the installed encoders"""
+
+    return [name for name, encoder in ENCODERS.items() if encoder is not None]
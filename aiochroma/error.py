@@ -24,6 +24,26 @@ class ChromaResultError(ChromaError):
     """Result error on the request"""
 
 
+class ChromaPayloadError(ChromaResultError):
+    """Payload rejected by the SDK"""
+
+
+class ChromaTransportError(ChromaError):
+    """SDK cannot be reached or the connection dropped"""
+
+
+class ChromaTimeout(ChromaTransportError):
+    """SDK did not respond in time"""
+
+
+class ChromaSessionExpired(ChromaTransportError):
+    """SDK session is lost and has to be re-created"""
+
+
+class ChromaCircuitOpen(ChromaTransportError):
+    """Reconnects are suspended after repeated failures"""
+
+
 class ChromaUnknownTarget(ChromaError):
     """Unknown target"""
 
@@ -0,0 +1,362 @@
+"""Frame module for AIOChroma
+
+Frames keep the colors of the device LEDs as packed BGR integers
+in a contiguous uint32 buffer. NumPy is used when available,
+`array('I')` otherwise.
+
+Frames can share a read-only buffer and its encoded payloads (see
+`generators`). Such frames copy the buffer on the first write, so they
+behave as ordinary frames with or without NumPy
+"""
+
+from __future__ import annotations
+
+from array import array
+from typing import Iterable, Sequence
+
+from .const import (
+    CHROMA_GEOMETRY,
+    CHROMA_KEYBOARD_HEIGHT,
+    CHROMA_KEYBOARD_WIDTH,
+    EFFECT_CUSTOM,
+    KEY_KEYBOARD,
+)
+from .dataclass import Color, brightness_table, scale_packed
+from .encoder import get_encoder
+from .error import ChromaUnknownTarget
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+def _packed(value: Color | int) -> int:
+    """Packed BGR int of the value"""
+
+    if isinstance(value, Color):
+        return value.as_int()
+    return int(value)
+
+
+class Frame:
+    """Frame of LED colors"""
+
+    __slots__ = ("_rows", "_columns", "_data", "_shared")
+
+    def __init__(
+        self,
+        rows: int,
+        columns: int,
+        value: Color | int | Iterable[int] = 0,
+    ):
+        """Initialize frame with a single color or flat list of packed colors"""
+
+        self._rows = rows
+        self._columns = columns
+        self._shared: dict[tuple[str, str], bytes] | None = None
+
+        size = rows * columns
+        if isinstance(value, (Color, int)):
+            values = None
+            fill = _packed(value)
+        else:
+            values = list(value)
+            if len(values) != size:
+                raise ValueError(
+                    f"Wrong number of values `{len(values)}` for frame `{rows}x{columns}`"
+                )
+
+        if np is not None:
+            if values is None:
+                self._data = np.full(size, fill, dtype=np.uint32)
+            else:
+                self._data = np.array(values, dtype=np.uint32)
+        else:
+            if values is None:
+                self._data = array("I", [fill]) * size
+            else:
+                self._data = array("I", values)
+
+    @classmethod
+    def from_grid(cls, grid: Sequence[Sequence[int]]) -> Frame:
+        """Create frame from the list of rows"""
+
+        columns = len(grid[0]) if grid else 0
+        for row in grid:
+            if len(row) != columns:
+                raise ValueError("Rows of the grid have different lengths")
+
+        return cls._from_flat(
+            len(grid), columns, [value for row in grid for value in row]
+        )
+
+    @classmethod
+    def _from_flat(cls, rows: int, columns: int, values: Iterable[int]) -> Frame:
+        """Create frame of the class with given geometry"""
+
+        frame = Frame.__new__(cls)
+        Frame.__init__(frame, rows, columns, values)
+        return frame
+
+    @classmethod
+    def _from_buffer(
+        cls,
+        rows: int,
+        columns: int,
+        data,
+        shared: dict[tuple[str, str], bytes] | None = None,
+    ) -> Frame:
+        """Wrap buffer of packed colors without copying
+
+        With `shared`, the buffer is read-only and shared between frames,
+        `shared` caches its payloads by effect and encoder. The frame
+        copies the buffer on the first write
+        """
+
+        frame = Frame.__new__(cls)
+        frame._rows = rows
+        frame._columns = columns
+        frame._data = data
+        frame._shared = shared
+        return frame
+
+    @classmethod
+    def for_target(cls, target: str, value: Color | int | Iterable[int] = 0) -> Frame:
+        """Create frame with the custom effect geometry of the target"""
+
+        if target == KEY_KEYBOARD:
+            return KeyboardFrame(value)
+
+        if target not in CHROMA_GEOMETRY:
+            raise ChromaUnknownTarget(target)
+
+        rows, columns = CHROMA_GEOMETRY[target]
+        return Frame(rows, columns, value)
+
+    def copy(self) -> Frame:
+        """Return a copy of the frame"""
+
+        frame = Frame.__new__(type(self))
+        frame._rows = self._rows
+        frame._columns = self._columns
+        frame._data = self._data.copy() if np is not None else array("I", self._data)
+        frame._shared = None
+        return frame
+
+    def _own(self) -> None:
+        """Copy the shared buffer before writing to it"""
+
+        if self._shared is not None:
+            self._data = self._data.copy() if np is not None else array("I", self._data)
+            self._shared = None
+
+    ### WRITE -->
+
+    def fill(self, value: Color | int) -> Frame:
+        """Fill the whole frame with one color"""
+
+        value = _packed(value)
+        self._own()
+        if np is not None:
+            self._data.fill(value)
+        else:
+            self._data = array("I", [value]) * len(self._data)
+        return self
+
+    def set_keys(self, indices: Iterable[int], value: Color | int) -> Frame:
+        """Set color of the LEDs by flat index"""
+
+        value = _packed(value)
+        self._own()
+        if np is not None:
+            self._data[np.fromiter(indices, dtype=np.intp)] = value
+        else:
+            data = self._data
+            for index in indices:
+                data[index] = value
+        return self
+
+    def set_mask(self, mask: Sequence[bool], value: Color | int) -> Frame:
+        """Set color of the LEDs selected by the boolean mask"""
+
+        if len(mask) != len(self._data):
+            raise ValueError(f"Wrong mask length `{len(mask)}`")
+
+        value = _packed(value)
+        self._own()
+        if np is not None:
+            self._data[np.asarray(mask, dtype=bool)] = value
+        else:
+            data = self._data
+            for index, selected in enumerate(mask):
+                if selected:
+                    data[index] = value
+        return self
+
+    def blend(self, other: Frame, alpha: float) -> Frame:
+        """Blend other frame over this one with the weight `alpha` in [0, 1]"""
+
+        if other.shape != self.shape:
+            raise ValueError(f"Cannot blend frames `{self.shape}` and `{other.shape}`")
+
+        weight = round(min(max(alpha, 0.0), 1.0) * 255)
+        self._shared = None
+        if np is not None:
+            result = np.zeros(len(self._data), dtype=np.uint32)
+            for shift in (0, 8, 16):
+                one = (self._data >> shift) & 0xFF
+                two = (other._data >> shift) & 0xFF
+                result |= ((one * (255 - weight) + two * weight + 127) // 255) << shift
+            self._data = result
+        else:
+            result = array("I", self._data)
+            for index, (one, two) in enumerate(zip(self._data, other._data)):
+                value = 0
+                for shift in (0, 8, 16):
+                    channel_one = (one >> shift) & 0xFF
+                    channel_two = (two >> shift) & 0xFF
+                    value |= (
+                        (channel_one * (255 - weight) + channel_two * weight + 127)
+                        // 255
+                    ) << shift
+                result[index] = value
+            self._data = result
+        return self
+
+    def scale(self, brightness: int) -> Frame:
+        """Scale all the colors to the brightness in [0, 255]"""
+
+        self._shared = None
+        if np is not None:
+            table = np.asarray(brightness_table(brightness), dtype=np.uint32)
+            data = self._data
+            self._data = (
+                table[data & 0xFF]
+                | table[(data >> 8) & 0xFF] << 8
+                | table[(data >> 16) & 0xFF] << 16
+            )
+        else:
+            self._data = array("I", scale_packed(self._data, brightness))
+        return self
+
+    ### <-- WRITE
+
+    ### READ -->
+
+    def to_list(self) -> list[list[int]]:
+        """Return the frame as a list of rows"""
+
+        if np is not None:
+            return self._data.reshape(self._rows, self._columns).tolist()
+
+        data = self._data.tolist()
+        columns = self._columns
+        return [data[i : i + columns] for i in range(0, len(data), columns)]
+
+    def to_json(self) -> str:
+        """Return the frame as JSON value of the effect `param`"""
+
+        data = self._data.tolist()
+        if self._rows == 1:
+            return "[" + ",".join(map(str, data)) + "]"
+
+        columns = self._columns
+        return (
+            "["
+            + ",".join(
+                "[" + ",".join(map(str, data[i : i + columns])) + "]"
+                for i in range(0, len(data), columns)
+            )
+            + "]"
+        )
+
+    def to_payload(
+        self, effect: str = EFFECT_CUSTOM, encoder: str | None = None
+    ) -> bytes:
+        """Return JSON payload of the custom effect with this frame"""
+
+        encoder = get_encoder(encoder)
+        if self._shared is None:
+            return encoder.custom(self._data, self.param_shape, effect)
+
+        key = (effect, encoder.name)
+        payload = self._shared.get(key)
+        if payload is None:
+            payload = self._shared[key] = encoder.custom(
+                self._data, self.param_shape, effect
+            )
+        return payload
+
+    def __getitem__(self, key: tuple[int, int]) -> int:
+        """Get packed color of the LED at (row, column)"""
+
+        row, column = key
+        return int(self._data[row * self._columns + column])
+
+    def __setitem__(self, key: tuple[int, int], value: Color | int) -> None:
+        """Set color of the LED at (row, column)"""
+
+        row, column = key
+        self._own()
+        self._data[row * self._columns + column] = _packed(value)
+
+    def __eq__(self, other: object) -> bool:
+        """Compare frames"""
+
+        if not isinstance(other, Frame):
+            return NotImplemented
+        return (
+            self.shape == other.shape and self._data.tobytes() == other._data.tobytes()
+        )
+
+    def __len__(self) -> int:
+        """Number of LEDs"""
+
+        return len(self._data)
+
+    def __repr__(self) -> str:
+        """Frame representation"""
+
+        return f"{type(self).__name__}({self._rows}x{self._columns})"
+
+    ### <-- READ
+
+    @property
+    def data(self):
+        """Flat buffer of packed colors"""
+
+        return self._data
+
+    @property
+    def shape(self) -> tuple[int, int]:
+        """Frame geometry as (rows, columns)"""
+
+        return (self._rows, self._columns)
+
+    @property
+    def param_shape(self) -> tuple[int, ...]:
+        """Shape of the effect `param`. Single-row frames are a flat list"""
+
+        if self._rows == 1:
+            return (self._columns,)
+        return (self._rows, self._columns)
+
+
+class KeyboardFrame(Frame):
+    """Frame of keyboard key colors"""
+
+    __slots__ = ()
+
+    def __init__(self, value: Color | int | Iterable[int] = 0):
+        """Initialize keyboard frame"""
+
+        super().__init__(CHROMA_KEYBOARD_HEIGHT, CHROMA_KEYBOARD_WIDTH, value)
+
+    @classmethod
+    def from_grid(cls, grid: Sequence[Sequence[int]]) -> KeyboardFrame:
+        """Create keyboard frame from the list of rows"""
+
+        if len(grid) != CHROMA_KEYBOARD_HEIGHT:
+            raise ValueError(f"Wrong number of rows `{len(grid)}`")
+        return super().from_grid(grid)
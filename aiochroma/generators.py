@@ -0,0 +1,539 @@
+"""Generators module
+
+Frame generators for the effects and precomputed frame sequences
+for the keyboard. Generators yield a frame for the clock sent to them
+(seconds since the start of the animation), starting with 0.
+
+Periodic effects are rendered for the whole period at once (vectorised
+with NumPy when available) and cached as packed colors, so playback
+only indexes the table. The frames played share the read-only rows of
+the table and their encoded payloads. Writing to such a frame copies
+its row first, so the cache is never modified
+"""
+
+from __future__ import annotations
+
+import colorsys
+import logging
+import math
+from array import array
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Generator, Iterable, Iterator, Sequence
+
+from .const import (
+    CHROMA_GEOMETRY,
+    DEFAULT_COLOR,
+    DEFAULT_FPS,
+    DEFAULT_PERIOD_CACHE_SIZE,
+    DEFAULT_SEQUENCE_CACHE_SIZE,
+    DEFAULT_SPACING,
+    KEY_KEYBOARD,
+)
+from .dataclass import Color
+from .error import ChromaUnknownTarget
+from .frame import Frame, KeyboardFrame, _packed
+from .layout import compile_layout, parse_message
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+_LOGGER = logging.getLogger(__name__)
+
+FrameGenerator = Generator[Frame, float, None]
+
+
+def _mix(one: int, two: int, level: float) -> int:
+    """Mix two packed colors with the weight `level` in [0, 1] of the second one"""
+
+    weight = round(min(max(level, 0.0), 1.0) * 255)
+    value = 0
+    for shift in (0, 8, 16):
+        channel_one = (one >> shift) & 0xFF
+        channel_two = (two >> shift) & 0xFF
+        value |= (
+            (channel_one * (255 - weight) + channel_two * weight + 127) // 255
+        ) << shift
+    return value
+
+
+def _mix_array(one: int, two: int, level):
+    """Mix two packed colors with the weights of the NumPy array `level`"""
+
+    weight = np.rint(np.clip(level, 0.0, 1.0) * 255).astype(np.uint32)
+    value = np.zeros(weight.shape, dtype=np.uint32)
+    for shift in (0, 8, 16):
+        channel_one = (one >> shift) & 0xFF
+        channel_two = (two >> shift) & 0xFF
+        value |= (
+            (channel_one * (255 - weight) + channel_two * weight + 127) // 255
+        ) << shift
+    return value
+
+
+### PERIODS -->
+
+
+def _geometry(target: str) -> tuple[int, int]:
+    """Custom effect geometry of the target"""
+
+    if target not in CHROMA_GEOMETRY:
+        raise ChromaUnknownTarget(target)
+    return CHROMA_GEOMETRY[target]
+
+
+def _count(period: float, fps: float) -> int:
+    """Number of frames rendered for the period"""
+
+    return max(1, round(period * fps))
+
+
+def _table(
+    rows: Sequence[Sequence[int]] | Iterable, size: int
+) -> tuple[tuple[Sequence[int], dict[tuple[str, str], bytes]], ...]:
+    """Table of frames from the packed colors of each frame
+
+    Each row is a read-only buffer with the cache of its payloads
+    """
+
+    if np is not None:
+        table = np.asarray(rows, dtype=np.uint32).reshape(-1, size)
+        table.flags.writeable = False
+        return tuple((row, dict()) for row in table)
+
+    return tuple((memoryview(array("I", row)).toreadonly(), dict()) for row in rows)
+
+
+@lru_cache(maxsize=DEFAULT_PERIOD_CACHE_SIZE)
+def _period_breathing(target: str, color: Color, period: float, fps: float):
+    """Frames of the breathing effect for one period"""
+
+    rows, columns = _geometry(target)
+    count = _count(period, fps)
+
+    if np is not None:
+        phase = np.arange(count) / count
+        level = np.rint((1 - np.cos(2 * np.pi * phase)) / 2 * 255)
+        ratio = level / 255
+        packed = (
+            np.rint(color.r * ratio).astype(np.uint32)
+            | np.rint(color.g * ratio).astype(np.uint32) << 8
+            | np.rint(color.b * ratio).astype(np.uint32) << 16
+        )
+        return _table(
+            np.repeat(packed[:, None], rows * columns, axis=1), rows * columns
+        )
+
+    return _table(
+        (
+            [
+                color.scale_int(
+                    round((1 - math.cos(2 * math.pi * index / count)) / 2 * 255)
+                )
+            ]
+            * (rows * columns)
+            for index in range(count)
+        ),
+        rows * columns,
+    )
+
+
+@lru_cache(maxsize=DEFAULT_PERIOD_CACHE_SIZE)
+def _period_spectrum(target: str, brightness: int, period: float, fps: float):
+    """Frames of the spectrum effect for one period"""
+
+    rows, columns = _geometry(target)
+    count = _count(period, fps)
+
+    packed = list()
+    for index in range(count):
+        r, g, b = colorsys.hsv_to_rgb(index / count, 1.0, brightness / 255)
+        packed.append(Color(round(r * 255), round(g * 255), round(b * 255)).as_int())
+
+    if np is not None:
+        return _table(
+            np.repeat(
+                np.asarray(packed, dtype=np.uint32)[:, None], rows * columns, axis=1
+            ),
+            rows * columns,
+        )
+
+    return _table(([value] * (rows * columns) for value in packed), rows * columns)
+
+
+@lru_cache(maxsize=DEFAULT_PERIOD_CACHE_SIZE)
+def _period_wave(
+    target: str,
+    color: Color,
+    background: Color | int,
+    period: float,
+    reverse: bool,
+    fps: float,
+):
+    """Frames of the wave effect for one period"""
+
+    rows, columns = _geometry(target)
+    count = _count(period, fps)
+    value_on = _packed(color)
+    value_off = _packed(background)
+    direction = -1 if reverse else 1
+
+    if np is not None:
+        phase = direction * np.arange(count)[:, None] / count
+        level = (
+            1 + np.cos(2 * np.pi * (np.arange(columns)[None, :] / columns - phase))
+        ) / 2
+        return _table(
+            np.tile(_mix_array(value_off, value_on, level), rows), rows * columns
+        )
+
+    return _table(
+        (
+            [
+                _mix(
+                    value_off,
+                    value_on,
+                    (
+                        1
+                        + math.cos(
+                            2 * math.pi * (column / columns - direction * index / count)
+                        )
+                    )
+                    / 2,
+                )
+                for column in range(columns)
+            ]
+            * rows
+            for index in range(count)
+        ),
+        rows * columns,
+    )
+
+
+@lru_cache(maxsize=DEFAULT_PERIOD_CACHE_SIZE)
+def _period_ripple(
+    target: str,
+    color: Color,
+    background: Color | int,
+    center: tuple[float, float] | None,
+    period: float,
+    width: float,
+    fps: float,
+):
+    """Frames of the ripple effect for one period"""
+
+    rows, columns = _geometry(target)
+    count = _count(period, fps)
+    if center is None:
+        center = ((rows - 1) / 2, (columns - 1) / 2)
+    value_on = _packed(color)
+    value_off = _packed(background)
+
+    distance = [
+        math.hypot(row - center[0], column - center[1])
+        for row in range(rows)
+        for column in range(columns)
+    ]
+    reach = max(distance) + width
+
+    if np is not None:
+        radius = np.arange(count)[:, None] / count * reach
+        level = 1 - np.abs(np.asarray(distance)[None, :] - radius) / width
+        return _table(_mix_array(value_off, value_on, level), rows * columns)
+
+    return _table(
+        (
+            [
+                _mix(
+                    value_off, value_on, 1 - abs(value - index / count * reach) / width
+                )
+                for value in distance
+            ]
+            for index in range(count)
+        ),
+        rows * columns,
+    )
+
+
+def _play(target: str, table, period: float) -> FrameGenerator:
+    """Play the frames of one period in a loop"""
+
+    rows, columns = _geometry(target)
+    frame_class = KeyboardFrame if target == KEY_KEYBOARD else Frame
+    count = len(table)
+    rate = count / period
+
+    t = 0.0
+    while True:
+        data, shared = table[round(t * rate) % count]
+        t = yield frame_class._from_buffer(rows, columns, data, shared)
+
+
+### <-- PERIODS
+
+### GENERATORS -->
+
+
+def breathing(
+    target: str,
+    color: Color = DEFAULT_COLOR,
+    period: float = 4.0,
+    fps: float = DEFAULT_FPS,
+) -> FrameGenerator:
+    """Whole target fading in and out
+
+    `fps` is the resolution of the precomputed period
+    """
+
+    return _play(target, _period_breathing(target, color, period, fps), period)
+
+
+def spectrum(
+    target: str,
+    brightness: int = 255,
+    period: float = 6.0,
+    fps: float = DEFAULT_FPS,
+) -> FrameGenerator:
+    """Whole target cycling through the hues"""
+
+    return _play(target, _period_spectrum(target, brightness, period, fps), period)
+
+
+def wave(
+    target: str,
+    color: Color = DEFAULT_COLOR,
+    background: Color | int = 0,
+    period: float = 2.0,
+    reverse: bool = False,
+    fps: float = DEFAULT_FPS,
+) -> FrameGenerator:
+    """Band of color moving across the columns"""
+
+    return _play(
+        target,
+        _period_wave(target, color, background, period, reverse, fps),
+        period,
+    )
+
+
+def ripple(
+    target: str,
+    color: Color = DEFAULT_COLOR,
+    background: Color | int = 0,
+    center: tuple[float, float] | None = None,
+    period: float = 1.5,
+    width: float = 1.5,
+    fps: float = DEFAULT_FPS,
+) -> FrameGenerator:
+    """Rings of color spreading from the center"""
+
+    return _play(
+        target,
+        _period_ripple(target, color, background, center, period, width, fps),
+        period,
+    )
+
+
+class Reactive:
+    """LEDs lighting up on `press` and fading out over `duration`
+
+    Iterate over the object to get the frame generator
+    """
+
+    def __init__(
+        self,
+        target: str,
+        color: Color = DEFAULT_COLOR,
+        background: Color | int = 0,
+        duration: float = 1.0,
+    ):
+        """Initialize reactive effect"""
+
+        self._target = target
+        self._color = _packed(color)
+        self._background = _packed(background)
+        self._duration = duration
+
+        self._pressed: list[int] = list()
+        self._lit: dict[int, float] = dict()
+
+    def press(self, indices: Iterable[int]) -> None:
+        """Light up the LEDs by flat index on the next frame"""
+
+        self._pressed.extend(indices)
+
+    def __iter__(self) -> FrameGenerator:
+        """Frame generator"""
+
+        frame = Frame.for_target(self._target)
+        lit = self._lit
+
+        t = 0.0
+        while True:
+            for index in self._pressed:
+                lit[index] = t
+            self._pressed.clear()
+
+            frame.fill(self._background)
+            for index, start in list(lit.items()):
+                level = 1 - (t - start) / self._duration
+                if level <= 0:
+                    del lit[index]
+                    continue
+                frame[divmod(index, frame.shape[1])] = _mix(
+                    self._background, self._color, level
+                )
+            t = yield frame
+
+
+def spinner(
+    message: str,
+    layout: str,
+    color: Color = DEFAULT_COLOR,
+    background: Color | int = 0,
+    tail: int = 0,
+    brightness: int | None = None,
+    step: float = DEFAULT_SPACING,
+    repeats: int | None = None,
+) -> FrameGenerator:
+    """Keyboard sequence (e.g. `KEYBOARD_SEQUENCE_LOAD`) advancing every `step`
+
+    Runs until cancelled or for `repeats` passes over the message
+    """
+
+    sequence = compile_sequence(message, layout, color, background, tail, brightness)
+    first, loop, last = sequence.first, sequence.loop, sequence.last
+    if not first or (repeats is not None and repeats < 1):
+        return
+
+    t = 0.0
+    while True:
+        index = int(t / step)
+        if index < len(first):
+            frame = first[index]
+        else:
+            index -= len(first)
+            if repeats is None:
+                frame = loop[index % len(loop)]
+            elif index < (repeats - 1) * len(loop):
+                frame = loop[index % len(loop)]
+            else:
+                index -= (repeats - 1) * len(loop)
+                if index >= len(last):
+                    return
+                frame = last[index]
+        t = yield frame.frame()
+
+
+### <-- GENERATORS
+
+
+@dataclass(frozen=True)
+class SequenceFrame:
+    """Precomputed keyboard frame"""
+
+    values: tuple[int, ...]
+    payload: bytes
+
+    def frame(self) -> KeyboardFrame:
+        """Return the values as a keyboard frame"""
+
+        return KeyboardFrame(self.values)
+
+
+@dataclass(frozen=True)
+class CompiledSequence:
+    """Precomputed frames of a keyboard sequence
+
+    `first` is the first pass over the message, `loop` is each of
+    the following passes (with the tail wrapping over from the previous
+    pass) and `last` clears the tail in the end
+    """
+
+    first: tuple[SequenceFrame, ...]
+    loop: tuple[SequenceFrame, ...]
+    last: tuple[SequenceFrame, ...]
+
+    def frames(self, repeats: int = 1) -> Iterator[SequenceFrame]:
+        """Iterate over the frames of the sequence repeated `repeats` times"""
+
+        if repeats < 1:
+            return
+
+        yield from self.first
+        for _ in range(repeats - 1):
+            yield from self.loop
+        yield from self.last
+
+    def __len__(self) -> int:
+        """Number of frames for a single repeat"""
+
+        return len(self.first) + len(self.last)
+
+
+@lru_cache(maxsize=DEFAULT_SEQUENCE_CACHE_SIZE)
+def compile_sequence(
+    message: str,
+    layout: str,
+    color: Color = DEFAULT_COLOR,
+    background: Color | int = 0,
+    tail: int = 0,
+    brightness: int | None = None,
+    encoder: str | None = None,
+) -> CompiledSequence:
+    """Compile message into the frames of a keyboard sequence"""
+
+    index = compile_layout(layout)
+
+    # Parse the message into flat key indices
+    keys: list[tuple[int, ...]] = list()
+    for key in parse_message(message):
+        if key in index:
+            keys.append(index[key])
+        else:
+            _LOGGER.warning(f"Key '{key}' is unknown")
+
+    if isinstance(background, int):
+        background = Color.from_int(background)
+
+    if brightness is None:
+        value_on = color.as_int()
+        value_off = background.as_int()
+    else:
+        value_on = color.scale_int(brightness)
+        value_off = background.scale_int(brightness)
+
+    frame = KeyboardFrame(value_off)
+
+    def snapshot() -> SequenceFrame:
+        return SequenceFrame(
+            tuple(frame.data.tolist()), frame.to_payload(encoder=encoder)
+        )
+
+    length = len(keys)
+    # Don't allow tail longer than message
+    if tail >= length:
+        tail = length - 1
+
+    # The first pass and the following ones differ by the wrapped tail
+    passes = list()
+    for _ in range(2):
+        frames = list()
+        for el in range(length):
+            # Turn off tail end
+            frame.set_keys(keys[el - tail - 1], value_off)
+            frame.set_keys(keys[el], value_on)
+            frames.append(snapshot())
+        passes.append(tuple(frames))
+
+    # Get rid of the tail in the end
+    last = list()
+    for el in range(length, length + tail + 1):
+        rudiment = el - tail - 1
+        if rudiment > -1:
+            frame.set_keys(keys[rudiment], value_off)
+        last.append(snapshot())
+
+    return CompiledSequence(passes[0], passes[1], tuple(last))
@@ -0,0 +1,230 @@
+"""Layout module for AIOChroma
+
+Keymaps place key names on the keyboard grid, layouts map characters and
+`{Key}` tokens to key names. Both are JSON data of the package (`data/`)
+loaded on first use, so the import stays cheap. A file may `extend` another
+one, which is how ANSI, ISO and TKL variants are described. Every key name
+of the keymap is a token of the layout as well.
+
+Layouts are compiled once into flat indices of the grid and shared between
+all the instances
+"""
+
+from __future__ import annotations
+
+import json
+import re
+from functools import lru_cache
+from importlib import resources
+from types import MappingProxyType
+from typing import Any, Iterable, Mapping
+
+from .const import (
+    CHROMA_KEYBOARD_WIDTH,
+    DEFAULT_KEYMAP,
+    DEFAULT_SEQUENCE_CACHE_SIZE,
+    KEY_TOKEN,
+)
+from .error import ChromaUnknownLayout
+
+DATA_KEYMAPS = "keymaps"
+DATA_LAYOUTS = "layouts"
+
+# Keymaps and layouts added at runtime, by kind
+_REGISTERED: dict[str, dict[str, Mapping[str, Any]]] = {
+    DATA_KEYMAPS: dict(),
+    DATA_LAYOUTS: dict(),
+}
+
+### REGISTRY -->
+
+
+@lru_cache(maxsize=None)
+def _packaged(kind: str) -> frozenset[str]:
+    """Names of the data files of the package"""
+
+    folder = resources.files(__package__).joinpath("data", kind)
+    return frozenset(
+        item.name[:-5] for item in folder.iterdir() if item.name.endswith(".json")
+    )
+
+
+def _names(kind: str) -> list[str]:
+    """Names of all the keymaps or layouts"""
+
+    return sorted(_packaged(kind) | _REGISTERED[kind].keys())
+
+
+@lru_cache(maxsize=None)
+def _data(kind: str, name: str) -> Mapping[str, Any]:
+    """Raw data of a keymap or layout"""
+
+    if name in _REGISTERED[kind]:
+        return _REGISTERED[kind][name]
+
+    if name not in _packaged(kind):
+        raise ChromaUnknownLayout(name)
+
+    raw = (
+        resources.files(__package__)
+        .joinpath("data", kind, f"{name}.json")
+        .read_text(encoding="utf-8")
+    )
+    return json.loads(raw)
+
+
+def _register(kind: str, name: str, data: Mapping[str, Any]) -> None:
+    """Add a keymap or layout and drop everything compiled before"""
+
+    # Imported here, generators depend on this module
+    from . import const
+    from .generators import compile_sequence
+
+    _REGISTERED[kind][name] = data
+    for cached in (
+        _data,
+        keymap,
+        key_index,
+        layout_tokens,
+        compile_layout,
+        parse_message,
+        compile_sequence,
+    ):
+        cached.cache_clear()
+
+    # `KEY_CODES` and `LAYOUT` are built again on the next access
+    for built in ("KEY_CODES", "LAYOUT"):
+        const.__dict__.pop(built, None)
+
+
+def register_keymap(name: str, data: Mapping[str, Any]) -> None:
+    """Add a keymap in the format of `data/keymaps`
+
+    `keys` maps key names to `[row, column]`, `extends` names the base
+    keymap and `remove` lists the keys of the base which are missing
+    """
+
+    _register(DATA_KEYMAPS, name, data)
+
+
+def register_layout(name: str, data: Mapping[str, Any]) -> None:
+    """Add a layout in the format of `data/layouts`
+
+    `tokens` maps characters to the key names to light up, `keymap` names
+    the keymap and `extends` the base layout
+    """
+
+    _register(DATA_LAYOUTS, name, data)
+
+
+def available_keymaps() -> list[str]:
+    """Names of the known keymaps"""
+
+    return _names(DATA_KEYMAPS)
+
+
+def available_layouts() -> list[str]:
+    """Names of the known layouts"""
+
+    return _names(DATA_LAYOUTS)
+
+
+### <-- REGISTRY
+
+### COMPILED -->
+
+
+@lru_cache(maxsize=None)
+def keymap(name: str = DEFAULT_KEYMAP) -> Mapping[str, tuple[int, int]]:
+    """Position of each key name as (row, column)"""
+
+    data = _data(DATA_KEYMAPS, name)
+
+    keys = dict(keymap(data["extends"])) if "extends" in data else dict()
+    for key in data.get("remove", ()):
+        keys.pop(key, None)
+    for key, (row, column) in data.get("keys", dict()).items():
+        keys[key] = (row, column)
+
+    return MappingProxyType(keys)
+
+
+@lru_cache(maxsize=None)
+def layout_tokens(layout: str) -> tuple[str, Mapping[str, tuple[str, ...]]]:
+    """Keymap name and the key names of each character or token of the layout"""
+
+    data = _data(DATA_LAYOUTS, layout)
+
+    if "extends" in data:
+        name, tokens = layout_tokens(data["extends"])
+        tokens = dict(tokens)
+    else:
+        name, tokens = DEFAULT_KEYMAP, dict()
+    name = data.get("keymap", name)
+
+    for token, keys in data.get("tokens", dict()).items():
+        tokens[token] = tuple(keys)
+
+    return name, MappingProxyType(tokens)
+
+
+@lru_cache(maxsize=None)
+def key_index(name: str = DEFAULT_KEYMAP) -> Mapping[str, int]:
+    """Flat grid index of each key name"""
+
+    return MappingProxyType(
+        {
+            key: row * CHROMA_KEYBOARD_WIDTH + column
+            for key, (row, column) in keymap(name).items()
+        }
+    )
+
+
+def key_indices(keys: Iterable[str], name: str = DEFAULT_KEYMAP) -> tuple[int, ...]:
+    """Flat grid indices of the key names"""
+
+    index = key_index(name)
+    return tuple(index[key] for key in keys)
+
+
+@lru_cache(maxsize=None)
+def compile_layout(layout: str) -> Mapping[str, tuple[int, ...]]:
+    """Compile layout into flat grid indices of each character or token"""
+
+    name, tokens = layout_tokens(layout)
+    index = key_index(name)
+
+    compiled = {key: (value,) for key, value in index.items()}
+    for token, keys in tokens.items():
+        # Tokens of the keys missing in the keymap (e.g. TKL) are skipped
+        if all(key in index for key in keys):
+            compiled[token] = tuple(index[key] for key in keys)
+
+    return MappingProxyType(compiled)
+
+
+### <-- COMPILED
+
+
+@lru_cache(maxsize=DEFAULT_SEQUENCE_CACHE_SIZE)
+def parse_message(message: str) -> tuple[str, ...]:
+    """Split message into characters and `{Key}` tokens"""
+
+    key_sp = dict()
+    keys = list()
+
+    # Find special keys
+    for match in re.finditer(KEY_TOKEN, message):
+        key_sp[match.start()] = match.group()
+
+    # List the sequence of keys to use
+    i = 0
+    while i < len(message):
+        if i in key_sp:
+            keys.append(key_sp[i][1:-1])
+            i += len(key_sp[i])
+        else:
+            keys.append(message[i])
+            i += 1
+
+    return tuple(keys)
@@ -0,0 +1,146 @@
+"""Metrics module
+
+Hooks on the connection hot path. Tracing is disabled unless a trace
+is passed to the connection, so there is no overhead by default
+"""
+
+from __future__ import annotations
+
+from bisect import bisect_left
+from typing import Any
+
+from .const import METRICS_LATENCY_BUCKETS
+from .error import ChromaResultError
+
+
+class ChromaTrace:
+    """Connection event callbacks. Override the ones you need
+
+    Callbacks are called synchronously on the event loop and should be cheap
+    """
+
+    def on_request(
+        self,
+        endpoint: str,
+        method: str,
+        latency: float,
+        sent: int,
+        received: int,
+        error: Exception | None = None,
+    ) -> None:
+        """Request finished (with or without an error)"""
+
+    def on_reconnect(self) -> None:
+        """Connection is re-established"""
+
+    def on_sleep(self, interval: float) -> None:
+        """Connection slept to space the requests"""
+
+
+class _Histogram:
+    """Cumulative latency histogram"""
+
+    __slots__ = ("buckets", "counts", "count", "total")
+
+    def __init__(self, buckets: tuple[float, ...]):
+        """Initialize histogram"""
+
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, value: float) -> None:
+        """Add value"""
+
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.total += value
+
+    def as_dict(self) -> dict[str, Any]:
+        """Histogram with cumulative bucket counts"""
+
+        cumulative = dict()
+        running = 0
+        for bucket, count in zip(self.buckets, self.counts):
+            running += count
+            cumulative[bucket] = running
+        cumulative["+Inf"] = self.count
+
+        return {"buckets": cumulative, "count": self.count, "sum": self.total}
+
+
+class ChromaMetrics(ChromaTrace):
+    """Trace collecting the connection metrics"""
+
+    def __init__(self, buckets: tuple[float, ...] = METRICS_LATENCY_BUCKETS):
+        """Initialize metrics"""
+
+        self._buckets = buckets
+        self.reset()
+
+    def reset(self) -> None:
+        """Reset all the metrics"""
+
+        self.requests: dict[str, int] = {}
+        self.latency: dict[str, _Histogram] = {}
+        self.bytes_sent: int = 0
+        self.bytes_received: int = 0
+        self.errors: dict[str, int] = {}
+        self.result_errors: dict[int, int] = {}
+        self.reconnects: int = 0
+        self.sleep_time: float = 0.0
+
+    def on_request(
+        self,
+        endpoint: str,
+        method: str,
+        latency: float,
+        sent: int,
+        received: int,
+        error: Exception | None = None,
+    ) -> None:
+        """Count request"""
+
+        self.requests[endpoint] = self.requests.get(endpoint, 0) + 1
+
+        histogram = self.latency.get(endpoint)
+        if histogram is None:
+            histogram = self.latency[endpoint] = _Histogram(self._buckets)
+        histogram.observe(latency)
+
+        self.bytes_sent += sent
+        self.bytes_received += received
+
+        if error is not None:
+            self.errors[endpoint] = self.errors.get(endpoint, 0) + 1
+            if isinstance(error, ChromaResultError) and error.args:
+                code = error.args[0]
+                self.result_errors[code] = self.result_errors.get(code, 0) + 1
+
+    def on_reconnect(self) -> None:
+        """Count reconnect"""
+
+        self.reconnects += 1
+
+    def on_sleep(self, interval: float) -> None:
+        """Count sleep time"""
+
+        self.sleep_time += interval
+
+    def as_dict(self) -> dict[str, Any]:
+        """All the metrics as a dict"""
+
+        return {
+            "requests": dict(self.requests),
+            "latency": {
+                endpoint: histogram.as_dict()
+                for endpoint, histogram in self.latency.items()
+            },
+            "bytes_sent": self.bytes_sent,
+            "bytes_received": self.bytes_received,
+            "errors": dict(self.errors),
+            "result_errors": dict(self.result_errors),
+            "reconnects": self.reconnects,
+            "sleep_time": self.sleep_time,
+        }
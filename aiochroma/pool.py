@@ -0,0 +1,205 @@
+"""Pool module
+
+Controller for many Chroma SDK hosts sharing one HTTP session
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Iterable, TypeVar
+
+import aiohttp
+
+from .aiochroma import AIOChroma
+from .connection import create_session
+from .const import DEFAULT_POOL_CONCURRENCY, DEFAULT_SLEEP
+from .dataclass import Color
+from .error import ChromaError, ChromaWrongParameter
+from .frame import Frame
+
+_LOGGER = logging.getLogger(__name__)
+
+_T = TypeVar("_T")
+
+
+class AIOChromaPool:
+    """Pool of AIOChroma hosts
+
+    All the hosts share one HTTP session. Operations run on the hosts
+    concurrently, at most `concurrency` at a time. A failing or slow host
+    does not block the others: its error is returned instead of raised
+    """
+
+    def __init__(
+        self,
+        hosts: Iterable[str],
+        targets: list[str],
+        layout: str,
+        session: aiohttp.ClientSession | None = None,
+        concurrency: int = DEFAULT_POOL_CONCURRENCY,
+        timeout: float | None = None,
+        groups: dict[str, Iterable[str]] | None = None,
+        **kwargs: Any,
+    ):
+        """Initialize pool. `kwargs` are passed to each `AIOChroma`"""
+
+        if concurrency < 1:
+            raise ChromaWrongParameter(f"Wrong `concurrency` value `{concurrency}`")
+
+        self._owns_session: bool = session is None
+        self._session: aiohttp.ClientSession = session or create_session()
+
+        self._hosts: dict[str, AIOChroma] = dict()
+        for host in hosts:
+            # Hosts with the SDK on a non-default port are given as `host:port`
+            options = dict(kwargs)
+            address, _, port = host.rpartition(":")
+            if address and port.isdigit() and ":" not in address:
+                options["port"] = int(port)
+            else:
+                address = host
+            self._hosts[host] = AIOChroma(
+                address, targets, layout, session=self._session, **options
+            )
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._timeout: float | None = timeout
+
+        self._groups: dict[str, list[str]] = dict()
+        for name, members in (groups or {}).items():
+            self.add_group(name, members)
+
+        self._errors: dict[str, Exception] = dict()
+
+    def add_group(self, name: str, hosts: Iterable[str]) -> None:
+        """Add or replace a named group of hosts"""
+
+        hosts = list(hosts)
+        for host in hosts:
+            if host not in self._hosts:
+                raise ChromaWrongParameter(f"Unknown host `{host}`")
+        self._groups[name] = hosts
+
+    def _select(self, hosts: Iterable[str] | str | None) -> list[str]:
+        """Hosts by the list, group name or all of them"""
+
+        if hosts is None:
+            return list(self._hosts)
+
+        if isinstance(hosts, str):
+            if hosts in self._groups:
+                return self._groups[hosts]
+            hosts = [hosts]
+
+        hosts = list(hosts)
+        for host in hosts:
+            if host not in self._hosts:
+                raise ChromaWrongParameter(f"Unknown host `{host}`")
+        return hosts
+
+    ### RUN -->
+
+    async def async_run(
+        self,
+        func: Callable[[AIOChroma], Awaitable[_T]],
+        hosts: Iterable[str] | str | None = None,
+    ) -> dict[str, _T | Exception]:
+        """Run the coroutine function on each host
+
+        `hosts` is a list of hosts, a group name or `None` for all.
+        Returns the result or the error of each host
+        """
+
+        selected = self._select(hosts)
+        results = await asyncio.gather(
+            *(self._async_run_host(host, func) for host in selected)
+        )
+        return dict(zip(selected, results))
+
+    async def _async_run_host(
+        self, host: str, func: Callable[[AIOChroma], Awaitable[_T]]
+    ) -> _T | Exception:
+        """Run the coroutine function on the host within the concurrency limit"""
+
+        async with self._semaphore:
+            try:
+                if self._timeout is not None:
+                    result = await asyncio.wait_for(
+                        func(self._hosts[host]), self._timeout
+                    )
+                else:
+                    result = await func(self._hosts[host])
+            except (ChromaError, asyncio.TimeoutError, aiohttp.ClientError) as ex:
+                _LOGGER.warning(f"Host `{host}` failed: {ex!r}")
+                self._errors[host] = ex
+                return ex
+
+        self._errors.pop(host, None)
+        return result
+
+    ### <-- RUN
+
+    async def async_connect(
+        self, hosts: Iterable[str] | str | None = None
+    ) -> dict[str, bool | Exception]:
+        """Identify and connect all the hosts concurrently"""
+
+        return await self.async_run(lambda chroma: chroma.async_connect(), hosts)
+
+    async def async_broadcast(
+        self,
+        scene: dict[str, Color | Frame | list | None],
+        hosts: Iterable[str] | str | None = None,
+        brightness: int | None = None,
+        sleep: float = DEFAULT_SLEEP,
+    ) -> dict[str, None | Exception]:
+        """Apply the scene to the hosts (see `AIOChroma.async_apply_scene`)"""
+
+        return await self.async_run(
+            lambda chroma: chroma.async_apply_scene(
+                scene, brightness=brightness, sleep=sleep
+            ),
+            hosts,
+        )
+
+    async def async_close(self) -> None:
+        """Disconnect all the hosts and close the own session"""
+
+        await self.async_run(lambda chroma: chroma.async_close())
+
+        if self._owns_session:
+            await self._session.close()
+
+    def __getitem__(self, host: str) -> AIOChroma:
+        """AIOChroma of the host"""
+
+        return self._hosts[host]
+
+    def __len__(self) -> int:
+        """Number of hosts"""
+
+        return len(self._hosts)
+
+    @property
+    def hosts(self) -> list[str]:
+        """All the hosts"""
+
+        return list(self._hosts)
+
+    @property
+    def groups(self) -> dict[str, list[str]]:
+        """Named groups of hosts"""
+
+        return {name: list(hosts) for name, hosts in self._groups.items()}
+
+    @property
+    def errors(self) -> dict[str, Exception]:
+        """Last error of the hosts that failed the last operation"""
+
+        return dict(self._errors)
+
+    @property
+    def connected(self) -> list[str]:
+        """Connected hosts"""
+
+        return [host for host, chroma in self._hosts.items() if chroma.connected]
@@ -0,0 +1,360 @@
+"""Recorder module
+
+Compact binary recording of the frames sent to the targets and
+memory-mapped replay. The file is an 8-byte header followed by records:
+a 16-byte record header and packed uint32 colors. Custom frames are
+stored whole or, with delta encoding, as (index, color) pairs of the
+changed LEDs
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import mmap
+import struct
+import sys
+import time
+from array import array
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Iterator, Sequence
+
+from .const import CHROMA_GEOMETRY, CHROMA_TARGETS, KEY_KEYBOARD
+from .dataclass import Color
+from .error import ChromaError, ChromaUnknownTarget
+from .frame import Frame, KeyboardFrame
+
+if TYPE_CHECKING:
+    from .aiochroma import AIOChroma
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+_LOGGER = logging.getLogger(__name__)
+
+RECORD_MAGIC = b"ACRF"
+RECORD_VERSION = 1
+RECORD_FLAG_DELTA = 0x01
+
+RECORD_NONE = 0
+RECORD_STATIC = 1
+RECORD_CUSTOM = 2
+RECORD_DELTA = 3
+
+# Magic, version, flags
+_HEADER = struct.Struct("<4sHH")
+# Timestamp, target index, kind, number of uint32 values
+_RECORD = struct.Struct("<dBBxxI")
+
+
+@dataclass(frozen=True)
+class FrameRecord:
+    """Frame read from a recording
+
+    `values` is empty for `RECORD_NONE`, a single color for `RECORD_STATIC`
+    and all the LED colors for `RECORD_CUSTOM` (delta records are resolved)
+    """
+
+    timestamp: float
+    target: str
+    kind: int
+    values: Sequence[int]
+
+    def frame(self) -> Frame:
+        """Custom record as a frame of the target
+
+        The frame shares the values and copies them on the first write
+        """
+
+        rows, columns = CHROMA_GEOMETRY[self.target]
+        frame_class = KeyboardFrame if self.target == KEY_KEYBOARD else Frame
+        return frame_class._from_buffer(rows, columns, self.values, shared=dict())
+
+
+class FrameRecorder:
+    """Writer of the frames sent by `AIOChroma` (see its `recorder`)"""
+
+    def __init__(self, path: str, delta: bool = False):
+        """Initialize recorder. The file is created on `open`"""
+
+        self._path = path
+        self._delta = delta
+        self._file = None
+        self._start: float | None = None
+        self._last: dict[str, Any] = dict()
+        self._records: int = 0
+
+    def open(self) -> FrameRecorder:
+        """Create the file and write the header"""
+
+        self._file = open(self._path, "wb")
+        self._file.write(
+            _HEADER.pack(
+                RECORD_MAGIC,
+                RECORD_VERSION,
+                RECORD_FLAG_DELTA if self._delta else 0,
+            )
+        )
+        self._start = None
+        self._last.clear()
+        self._records = 0
+        return self
+
+    def close(self) -> None:
+        """Flush and close the file"""
+
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self) -> FrameRecorder:
+        """Open recorder as a context manager"""
+
+        return self.open()
+
+    def __exit__(self, *_args: Any) -> None:
+        """Close recorder"""
+
+        self.close()
+
+    ### RECORD -->
+
+    def none(self, target: str) -> None:
+        """Record the none effect"""
+
+        self._write(target, RECORD_NONE, b"", 0)
+
+    def static(self, target: str, color: int) -> None:
+        """Record the static effect with a packed color"""
+
+        self._write(target, RECORD_STATIC, struct.pack("<I", color), 1)
+
+    def frame(self, target: str, frame: Frame) -> None:
+        """Record a custom frame"""
+
+        data = frame.data
+        if np is not None:
+            data = np.asarray(data, dtype="<u4")
+            values = data.copy()
+        else:
+            values = array("I", data)
+
+        last = self._last.get(target)
+        self._last[target] = values
+
+        if self._delta and last is not None and len(last) == len(values):
+            if np is not None:
+                changed = np.flatnonzero(last != values).astype("<u4")
+                pairs = np.empty(len(changed) * 2, dtype="<u4")
+                pairs[0::2] = changed
+                pairs[1::2] = values[changed]
+                count = len(pairs)
+                raw = pairs.tobytes()
+            else:
+                pairs = array("I")
+                for index, (one, two) in enumerate(zip(last, values)):
+                    if one != two:
+                        pairs.append(index)
+                        pairs.append(two)
+                count = len(pairs)
+                raw = self._bytes(pairs)
+
+            # Whole frames are smaller when most of the LEDs change
+            if count < len(values):
+                self._write(target, RECORD_DELTA, raw, count)
+                return
+
+        raw = values.tobytes() if np is not None else self._bytes(values)
+        self._write(target, RECORD_CUSTOM, raw, len(values))
+
+    ### <-- RECORD
+
+    @staticmethod
+    def _bytes(values: array) -> bytes:
+        """Little-endian bytes of the array"""
+
+        if sys.byteorder != "little":
+            values = array("I", values)
+            values.byteswap()
+        return values.tobytes()
+
+    def _write(self, target: str, kind: int, raw: bytes, count: int) -> None:
+        """Write the record"""
+
+        if self._file is None:
+            raise ChromaError("Recorder is not open")
+        if target not in CHROMA_TARGETS:
+            raise ChromaUnknownTarget(target)
+
+        now = time.monotonic()
+        if self._start is None:
+            self._start = now
+
+        self._file.write(
+            _RECORD.pack(now - self._start, CHROMA_TARGETS.index(target), kind, count)
+        )
+        self._file.write(raw)
+        self._records += 1
+
+    def __len__(self) -> int:
+        """Number of records written"""
+
+        return self._records
+
+    @property
+    def path(self) -> str:
+        """Path of the recording"""
+
+        return self._path
+
+
+class FrameReader:
+    """Memory-mapped reader of a recording
+
+    Custom frames are views of the mapped file, so replay does not copy
+    or render anything
+    """
+
+    def __init__(self, path: str):
+        """Map the file and index the records"""
+
+        self._path = path
+        with open(path, "rb") as file:
+            try:
+                self._mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError as ex:
+                # Empty file cannot be mapped
+                raise ChromaError(f"Not a frame recording: {path}") from ex
+
+        if len(self._mmap) < _HEADER.size:
+            raise ChromaError(f"Not a frame recording: {path}")
+        magic, version, self._flags = _HEADER.unpack_from(self._mmap, 0)
+        if magic != RECORD_MAGIC or version != RECORD_VERSION:
+            raise ChromaError(f"Not a frame recording: {path}")
+
+        # Offsets of the records
+        self._offsets: list[int] = list()
+        offset = _HEADER.size
+        size = len(self._mmap)
+        while offset + _RECORD.size <= size:
+            self._offsets.append(offset)
+            count = _RECORD.unpack_from(self._mmap, offset)[3]
+            offset += _RECORD.size + count * 4
+        if offset != size:
+            _LOGGER.warning(f"Recording {path} is truncated")
+        if offset > size:
+            self._offsets.pop()
+
+    def _values(self, offset: int, count: int) -> Sequence[int]:
+        """View of the packed colors in the file"""
+
+        if np is not None:
+            return np.frombuffer(self._mmap, dtype="<u4", count=count, offset=offset)
+
+        view = memoryview(self._mmap)[offset : offset + count * 4].cast("I")
+        if sys.byteorder != "little":
+            view = array("I", view)
+            view.byteswap()
+        return view
+
+    def __iter__(self) -> Iterator[FrameRecord]:
+        """Iterate over the records, resolving the delta ones"""
+
+        frames: dict[str, Any] = dict()
+        for offset in self._offsets:
+            timestamp, index, kind, count = _RECORD.unpack_from(self._mmap, offset)
+            target = CHROMA_TARGETS[index]
+            values = self._values(offset + _RECORD.size, count)
+
+            if kind == RECORD_DELTA:
+                frame = frames.get(target)
+                if frame is None:
+                    raise ChromaError(f"Delta record without a frame for `{target}`")
+                if np is not None:
+                    frame[values[0::2]] = values[1::2]
+                else:
+                    for position in range(0, count, 2):
+                        frame[values[position]] = values[position + 1]
+                values = frame.copy() if np is not None else array("I", frame)
+                kind = RECORD_CUSTOM
+            elif kind == RECORD_CUSTOM and self.delta:
+                # Delta records are applied over a writable copy
+                frames[target] = values.copy() if np is not None else array("I", values)
+
+            yield FrameRecord(timestamp, target, kind, values)
+
+    def __len__(self) -> int:
+        """Number of records"""
+
+        return len(self._offsets)
+
+    async def async_replay(
+        self,
+        chroma: AIOChroma,
+        rate: float = 1.0,
+        targets: list[str] | None = None,
+    ) -> int:
+        """Send the recording through AIOChroma at `rate` times the original speed
+
+        Returns the number of frames sent
+        """
+
+        if rate <= 0:
+            raise ChromaError(f"Wrong `rate` value `{rate}`")
+
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        sent = 0
+
+        for record in self:
+            if targets is not None and record.target not in targets:
+                continue
+
+            delay = start + record.timestamp / rate - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+
+            if record.kind == RECORD_NONE:
+                await chroma.async_effect_none(target=record.target, sleep=0)
+            elif record.kind == RECORD_STATIC:
+                await chroma.async_effect_color(
+                    target=record.target,
+                    color=Color.from_int(int(record.values[0])),
+                    brightness=255,
+                    sleep=0,
+                )
+            else:
+                await chroma.async_effect_custom(
+                    target=record.target,
+                    effect=record.frame(),
+                    spacing=0,
+                    stream=True,
+                )
+            sent += 1
+
+        return sent
+
+    def close(self) -> None:
+        """Unmap the file"""
+
+        try:
+            self._mmap.close()
+        except BufferError:
+            # Frames still refer to the mapping, it is released with them
+            _LOGGER.debug(f"Recording {self._path} is still in use")
+
+    @property
+    def delta(self) -> bool:
+        """Recording has delta records"""
+
+        return bool(self._flags & RECORD_FLAG_DELTA)
+
+    @property
+    def duration(self) -> float:
+        """Timestamp of the last record"""
+
+        if not self._offsets:
+            return 0.0
+        return _RECORD.unpack_from(self._mmap, self._offsets[-1])[0]
@@ -0,0 +1,366 @@
+"""Server module
+
+Local stand-in for the Chroma SDK REST API, to run the library, tests
+and benchmarks without Razer Synapse
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import socket
+import uuid
+from dataclasses import dataclass, field
+from typing import Any
+
+from aiohttp import web
+
+from .const import (
+    CHROMA_EFFECT,
+    CHROMA_ID,
+    CHROMA_IDS,
+    CHROMA_PARAM,
+    CHROMA_TARGETS,
+    DEFAULT_PORT,
+    RESULT_INVALID_PARAMETER,
+    URL_EFFECT,
+    URL_MAIN,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+RESULT_SUCCESS = 0
+RESULT_NOT_FOUND = 1168
+
+SERVER_IDENTITY = {"core": "3.0.0", "device": "3.0.0", "version": "3.0.0"}
+
+
+@dataclass
+class Fault:
+    """Error to inject into the server responses
+
+    `endpoint` limits the fault to one endpoint (`heartbeat`, `keyboard`, ...),
+    `status` is the HTTP status, `result` the Chroma result code,
+    `malformed` replaces the body with invalid JSON and `delay` holds
+    the response for the given number of seconds
+    """
+
+    endpoint: str | None = None
+    status: int = 200
+    result: int | None = None
+    malformed: bool = False
+    delay: float = 0.0
+    count: int = 1
+
+
+@dataclass
+class RecordedFrame:
+    """Request received by the server"""
+
+    timestamp: float
+    session: int
+    method: str
+    endpoint: str
+    payload: Any
+    peer: tuple | None = None
+
+
+@dataclass
+class _Session:
+    """SDK session with its own port"""
+
+    sid: int
+    runner: web.AppRunner
+    tick: int = 0
+    last_seen: float = 0.0
+    effects: dict[str, Any] = field(default_factory=dict)
+
+
+class ChromaSDKServer:
+    """Fake Chroma SDK server"""
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = DEFAULT_PORT,
+        latency: float = 0.0,
+        session_timeout: float | None = None,
+    ):
+        """Initialize server. Use `port=0` for a free port"""
+
+        self._host = host
+        self._port = port
+
+        self.latency = latency
+        self.session_timeout = session_timeout
+
+        self._runner: web.AppRunner | None = None
+        self._sessions: dict[int, _Session] = {}
+        self._faults: list[Fault] = []
+
+        self.frames: list[RecordedFrame] = []
+        self.connects: int = 0
+
+    ### SERVER -->
+
+    async def async_start(self) -> None:
+        """Start listening on the main port"""
+
+        app = web.Application()
+        app.router.add_route("*", f"/{URL_MAIN}", self._handle_main)
+
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        self._port = await self._async_listen(self._runner, self._port)
+
+        _LOGGER.debug(f"Fake Chroma SDK listening on {self._host}:{self._port}")
+
+    async def async_stop(self) -> None:
+        """Stop the server and all the sessions"""
+
+        for session in list(self._sessions.values()):
+            await self._async_close_session(session)
+
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def __aenter__(self) -> ChromaSDKServer:
+        """Start server as a context manager"""
+
+        await self.async_start()
+        return self
+
+    async def __aexit__(self, *_args: Any) -> None:
+        """Stop server"""
+
+        await self.async_stop()
+
+    async def _async_listen(self, runner: web.AppRunner, port: int) -> int:
+        """Listen on the port. Return the actual port"""
+
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind((self._host, port))
+        await web.SockSite(runner, sock).start()
+
+        return sock.getsockname()[1]
+
+    ### <-- SERVER
+
+    ### FAULTS -->
+
+    def inject(self, fault: Fault | None = None, **kwargs: Any) -> Fault:
+        """Inject fault into the next matching responses"""
+
+        fault = fault or Fault(**kwargs)
+        self._faults.append(fault)
+        return fault
+
+    def clear_faults(self) -> None:
+        """Remove all the injected faults"""
+
+        self._faults.clear()
+
+    def _take_fault(self, endpoint: str) -> Fault | None:
+        """Get the fault for the endpoint if any"""
+
+        for fault in self._faults:
+            if fault.endpoint is None or fault.endpoint == endpoint:
+                fault.count -= 1
+                if fault.count < 1:
+                    self._faults.remove(fault)
+                return fault
+        return None
+
+    async def _async_respond(
+        self, endpoint: str, body: dict[str, Any]
+    ) -> web.StreamResponse:
+        """Build response with latency and injected faults"""
+
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+        fault = self._take_fault(endpoint)
+        if fault is None:
+            return web.json_response(body)
+
+        if fault.delay:
+            await asyncio.sleep(fault.delay)
+        if fault.status != 200:
+            return web.Response(status=fault.status)
+        if fault.malformed:
+            return web.Response(text="{malformed", content_type="application/json")
+        if fault.result is not None:
+            body = {**body, "result": fault.result}
+        return web.json_response(body)
+
+    ### <-- FAULTS
+
+    ### HANDLERS -->
+
+    async def _handle_main(self, request: web.Request) -> web.StreamResponse:
+        """Identify and connect"""
+
+        if request.method == "GET":
+            return await self._async_respond(URL_MAIN, dict(SERVER_IDENTITY))
+
+        if request.method != "POST":
+            return web.Response(status=405)
+
+        try:
+            await request.json()
+        except ValueError:
+            return await self._async_respond(
+                URL_MAIN, {"result": RESULT_INVALID_PARAMETER}
+            )
+
+        app = web.Application()
+        app.router.add_route("*", "/chromasdk", self._handle_session)
+        app.router.add_route("*", "/chromasdk/", self._handle_session)
+        app.router.add_route("*", "/chromasdk/{endpoint}", self._handle_session)
+
+        runner = web.AppRunner(app, access_log=None)
+        await runner.setup()
+        sid = await self._async_listen(runner, 0)
+
+        loop = asyncio.get_running_loop()
+        self._sessions[sid] = _Session(sid=sid, runner=runner, last_seen=loop.time())
+        self.connects += 1
+
+        return await self._async_respond(
+            URL_MAIN,
+            {"sessionid": sid, "uri": f"http://{self._host}:{sid}/chromasdk"},
+        )
+
+    async def _handle_session(self, request: web.Request) -> web.StreamResponse:
+        """Requests to the session port"""
+
+        loop = asyncio.get_running_loop()
+        sid = request.transport.get_extra_info("sockname")[1]
+        endpoint = request.match_info.get("endpoint", "")
+
+        session = self._sessions.get(sid)
+        if session is None or (
+            self.session_timeout is not None
+            and loop.time() - session.last_seen > self.session_timeout
+        ):
+            if session is not None:
+                asyncio.ensure_future(self._async_close_session(session))
+            return web.Response(status=404)
+        session.last_seen = loop.time()
+
+        raw = await request.text()
+        try:
+            payload = json.loads(raw) if raw else None
+        except ValueError:
+            payload = raw
+
+        self.frames.append(
+            RecordedFrame(
+                timestamp=loop.time(),
+                session=sid,
+                method=request.method,
+                endpoint=endpoint,
+                payload=payload,
+                peer=request.transport.get_extra_info("peername"),
+            )
+        )
+
+        # Disconnect
+        if endpoint == "" and request.method == "DELETE":
+            asyncio.ensure_future(self._async_close_session(session))
+            return await self._async_respond(endpoint, {"result": RESULT_SUCCESS})
+
+        if endpoint == "heartbeat":
+            session.tick += 1
+            return await self._async_respond(endpoint, {"tick": session.tick})
+
+        if endpoint == URL_EFFECT:
+            return await self._async_respond(
+                endpoint, self._effect(session, request.method, payload)
+            )
+
+        if endpoint in CHROMA_TARGETS:
+            return await self._async_respond(
+                endpoint, self._device(session, request.method, endpoint, payload)
+            )
+
+        return web.Response(status=404)
+
+    def _device(
+        self, session: _Session, method: str, endpoint: str, payload: Any
+    ) -> dict[str, Any]:
+        """Apply (PUT) or create (POST) device effect"""
+
+        if not isinstance(payload, dict) or CHROMA_EFFECT not in payload:
+            return {"result": RESULT_INVALID_PARAMETER}
+        if payload[CHROMA_EFFECT] != "CHROMA_NONE" and CHROMA_PARAM not in payload:
+            return {"result": RESULT_INVALID_PARAMETER}
+
+        if method == "POST":
+            effect_id = str(uuid.uuid4())
+            session.effects[effect_id] = (endpoint, payload)
+            return {"id": effect_id, "result": RESULT_SUCCESS}
+        if method == "PUT":
+            return {"result": RESULT_SUCCESS}
+        return {"result": RESULT_INVALID_PARAMETER}
+
+    def _effect(self, session: _Session, method: str, payload: Any) -> dict[str, Any]:
+        """Apply (PUT) or delete (DELETE) pre-created effects"""
+
+        if not isinstance(payload, dict):
+            return {"result": RESULT_INVALID_PARAMETER}
+
+        if method == "PUT":
+            if payload.get(CHROMA_ID) not in session.effects:
+                return {"result": RESULT_NOT_FOUND}
+            return {"result": RESULT_SUCCESS}
+
+        if method == "DELETE":
+            effect_ids = payload.get(CHROMA_IDS) or [payload.get(CHROMA_ID)]
+            results = list()
+            for effect_id in effect_ids:
+                found = session.effects.pop(effect_id, None) is not None
+                results.append(
+                    {
+                        CHROMA_ID: effect_id,
+                        "result": RESULT_SUCCESS if found else RESULT_NOT_FOUND,
+                    }
+                )
+            return {"results": results, "result": RESULT_SUCCESS}
+
+        return {"result": RESULT_INVALID_PARAMETER}
+
+    async def _async_close_session(self, session: _Session) -> None:
+        """Stop listening on the session port"""
+
+        if self._sessions.pop(session.sid, None) is not None:
+            await session.runner.cleanup()
+
+    ### <-- HANDLERS
+
+    def reset(self) -> None:
+        """Forget the recorded frames and faults"""
+
+        self.frames.clear()
+        self._faults.clear()
+
+    @property
+    def port(self) -> int:
+        """Main port"""
+
+        return self._port
+
+    @property
+    def sessions(self) -> list[int]:
+        """Active session IDs"""
+
+        return list(self._sessions)
+
+    @property
+    def effects(self) -> dict[int, dict[str, Any]]:
+        """Pre-created effects by session"""
+
+        return {sid: dict(session.effects) for sid, session in self._sessions.items()}
@@ -0,0 +1,296 @@
+"""Benchmark suite for AIOChroma
+
+Run from the repository root:
+
+    python -m benchmarks --output bench_output.txt
+
+Network benchmarks run against the local fake Chroma SDK server.
+Results are printed as JSON
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from typing import Any, Awaitable, Callable
+
+from aiochroma import AIOChroma, Color, KeyboardFrame
+from aiochroma.const import (
+    CHROMA_EFFECT,
+    CHROMA_KEYBOARD_HEIGHT,
+    CHROMA_KEYBOARD_WIDTH,
+    CHROMA_PARAM,
+    CHROMA_TARGETS,
+    EFFECT_CUSTOM,
+    KEY_KEYBOARD,
+    KEYBOARD_SEQUENCE_LOAD,
+)
+from aiochroma.encoder import available_encoders, get_encoder
+from aiochroma.frame import np
+from aiochroma.generators import _period_wave, wave
+from aiochroma.layout import parse_message
+from aiochroma.server import ChromaSDKServer
+
+TRACE_COUNT = 20
+
+RESPONSE = b'{"id":"2e1a3f7c-1b7a-4b0e-9f55-6c1f3b8e9a10","result":0}'
+
+MESSAGE = "The quick brown fox jumps over the lazy dog {Num1}{Num2}{Num3} " * 4
+
+
+def _percentile(values: list[float], percent: float) -> float:
+    """Percentile of the sorted values"""
+
+    if not values:
+        return 0.0
+    index = min(len(values) - 1, round(percent / 100 * (len(values) - 1)))
+    return values[index]
+
+
+def _summary(latencies: list[float], elapsed: float, peak: int) -> dict[str, Any]:
+    """Summary of a benchmark"""
+
+    latencies = sorted(latencies)
+    return {
+        "count": len(latencies),
+        "elapsed_s": elapsed,
+        "per_s": len(latencies) / elapsed if elapsed else 0.0,
+        "mean_ms": statistics.fmean(latencies) * 1000 if latencies else 0.0,
+        "p50_ms": _percentile(latencies, 50) * 1000,
+        "p99_ms": _percentile(latencies, 99) * 1000,
+        "peak_bytes": peak,
+    }
+
+
+def bench_cpu(func: Callable[[], Any], count: int) -> dict[str, Any]:
+    """Measure a pure-CPU function"""
+
+    func()
+
+    latencies = list()
+    start = time.perf_counter()
+    for _ in range(count):
+        call = time.perf_counter()
+        func()
+        latencies.append(time.perf_counter() - call)
+    elapsed = time.perf_counter() - start
+
+    # Memory is traced in a separate pass, tracing slows everything down
+    tracemalloc.start()
+    for _ in range(min(count, TRACE_COUNT)):
+        func()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return _summary(latencies, elapsed, peak)
+
+
+async def bench_async(
+    func: Callable[[], Awaitable[Any]], count: int, trace: int = TRACE_COUNT
+) -> dict[str, Any]:
+    """Measure an async function"""
+
+    latencies = list()
+    start = time.perf_counter()
+    for _ in range(count):
+        call = time.perf_counter()
+        await func()
+        latencies.append(time.perf_counter() - call)
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    for _ in range(min(count, trace)):
+        await func()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return _summary(latencies, elapsed, peak)
+
+
+def run_cpu(count: int) -> dict[str, Any]:
+    """Pure-CPU benchmarks"""
+
+    color = Color(200, 100, 50)
+    grid = [
+        [
+            (row * CHROMA_KEYBOARD_WIDTH + column) * 997 & 0xFFFFFF
+            for column in range(CHROMA_KEYBOARD_WIDTH)
+        ]
+        for row in range(CHROMA_KEYBOARD_HEIGHT)
+    ]
+    frame = KeyboardFrame.from_grid(grid)
+
+    animation = wave(KEY_KEYBOARD, color)
+    next(animation)
+    clock = iter(range(10**9))
+
+    return {
+        "parse_message": bench_cpu(lambda: parse_message.__wrapped__(MESSAGE), count),
+        "color_scale_as_int": bench_cpu(lambda: color.scale(128).as_int(), count * 10),
+        "color_scale_int": bench_cpu(lambda: color.scale_int(128), count * 10),
+        "frame_scale": bench_cpu(lambda: frame.copy().scale(128), count),
+        "encode_json_grid": bench_cpu(
+            lambda: json.dumps({CHROMA_EFFECT: EFFECT_CUSTOM, CHROMA_PARAM: grid}),
+            count,
+        ),
+        "encode_frame_payload": bench_cpu(frame.to_payload, count),
+        "render_wave_period": bench_cpu(
+            lambda: _period_wave.__wrapped__(KEY_KEYBOARD, color, 0, 2.0, False, 20.0),
+            max(1, count // 10),
+        ),
+        "play_wave_frame": bench_cpu(
+            lambda: animation.send(next(clock) / 20).to_payload(), count
+        ),
+        **{
+            f"encode_custom_{name}": bench_cpu(
+                lambda encoder=get_encoder(name): encoder.custom(
+                    frame.data, frame.shape
+                ),
+                count,
+            )
+            for name in available_encoders()
+        },
+        **{
+            f"decode_response_{name}": bench_cpu(
+                lambda encoder=get_encoder(name): encoder.loads(RESPONSE),
+                count * 10,
+            )
+            for name in available_encoders()
+        },
+    }
+
+
+async def run_network(
+    frames: int, latency: float, encoder: str | None = None
+) -> dict[str, Any]:
+    """Benchmarks against the fake SDK server"""
+
+    results: dict[str, Any] = dict()
+
+    async with ChromaSDKServer(port=0, latency=latency) as server:
+        chroma = AIOChroma(
+            "127.0.0.1",
+            CHROMA_TARGETS,
+            "EN_US",
+            port=server.port,
+            encoder=encoder,
+        )
+        await chroma.async_connect()
+
+        colors = [Color(i % 256, 255 - i % 256, 0) for i in range(frames)]
+        grids = [KeyboardFrame(colors[i]) for i in range(frames)]
+        step = iter(range(10**9))
+
+        async def effect_keyboard() -> None:
+            await chroma.async_effect_keyboard(grids[next(step) % frames], spacing=0)
+
+        results["effect_keyboard"] = await bench_async(effect_keyboard, frames)
+
+        async def effect_color_fanout() -> None:
+            color = colors[next(step) % frames]
+            for target in CHROMA_TARGETS:
+                await chroma.async_effect_color(target, color, sleep=0)
+
+        results["effect_color_fanout"] = await bench_async(
+            effect_color_fanout, max(1, frames // len(CHROMA_TARGETS))
+        )
+
+        async def apply_scene() -> None:
+            color = colors[next(step) % frames]
+            await chroma.async_apply_scene(
+                {target: color for target in CHROMA_TARGETS}, sleep=0
+            )
+
+        results["apply_scene"] = await bench_async(
+            apply_scene, max(1, frames // len(CHROMA_TARGETS))
+        )
+
+        async def keyboard_sequence() -> None:
+            await chroma.async_keyboard_sequence(
+                MESSAGE, color=colors[0], spacing=0, sleep=0
+            )
+
+        sent = len(server.frames)
+        results["keyboard_sequence"] = await bench_async(keyboard_sequence, 1, 0)
+        results["keyboard_sequence"]["frames"] = len(server.frames) - sent
+
+        async def keyboard_spinner() -> None:
+            await chroma.async_keyboard_sequence(
+                KEYBOARD_SEQUENCE_LOAD,
+                color=colors[0],
+                tail=2,
+                repeats=4,
+                spacing=0,
+                sleep=0,
+            )
+
+        results["keyboard_spinner"] = await bench_async(keyboard_spinner, 1, 0)
+
+        # Frames of a session should reuse one persistent TCP connection
+        peers: dict[int, set] = dict()
+        for frame in server.frames:
+            peers.setdefault(frame.session, set()).add(frame.peer)
+        results["tcp_connections"] = {
+            "frames": len(server.frames),
+            "connections": sum(len(session) for session in peers.values()),
+        }
+
+        await chroma.async_close()
+
+    return results
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Run the benchmarks"""
+
+    parser = argparse.ArgumentParser(prog="python -m benchmarks")
+    parser.add_argument(
+        "--frames", type=int, default=200, help="frames per network benchmark"
+    )
+    parser.add_argument(
+        "--count", type=int, default=2000, help="iterations per CPU benchmark"
+    )
+    parser.add_argument(
+        "--latency", type=float, default=0.0, help="fake SDK latency, s"
+    )
+    parser.add_argument(
+        "--encoder", choices=available_encoders(), help="payload encoder"
+    )
+    parser.add_argument("--output", "-o", help="write JSON to the file")
+    parser.add_argument("--skip-network", action="store_true")
+    args = parser.parse_args(argv)
+
+    report: dict[str, Any] = {
+        "meta": {
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "numpy": np.__version__ if np is not None else None,
+            "frames": args.frames,
+            "count": args.count,
+            "latency_s": args.latency,
+            "encoder": get_encoder(args.encoder).name,
+        },
+        "cpu": run_cpu(args.count),
+    }
+    if not args.skip_network:
+        report["network"] = asyncio.run(
+            run_network(args.frames, args.latency, args.encoder)
+        )
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            file.write(output + "\n")
+    print(output)
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
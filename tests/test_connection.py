@@ -0,0 +1,81 @@
+"""Tests of the HTTP connection against the fake SDK server"""
+
+from __future__ import annotations
+
+import asyncio
+
+from aiochroma import AIOChroma, Color, KeyboardFrame
+from aiochroma.const import CHROMA_TARGETS, DEFAULT_LIMIT_PER_HOST, KEY_KEYBOARD
+from aiochroma.server import ChromaSDKServer
+
+FRAMES = 100
+
+
+def _connections(server: ChromaSDKServer) -> int:
+    """Number of TCP connections the frames of the server came over"""
+
+    peers: dict[int, set] = dict()
+    for frame in server.frames:
+        peers.setdefault(frame.session, set()).add(frame.peer)
+    return sum(len(session) for session in peers.values())
+
+
+async def _async_stream(**kwargs) -> tuple[int, int]:
+    """Stream keyboard frames and scenes, return frames and connections"""
+
+    async with ChromaSDKServer(port=0) as server:
+        chroma = AIOChroma(
+            "127.0.0.1", CHROMA_TARGETS, "EN_US", port=server.port, **kwargs
+        )
+        try:
+            await chroma.async_connect()
+
+            for step in range(FRAMES):
+                await chroma.async_effect_keyboard(
+                    KeyboardFrame(Color(step, 0, 255 - step)), spacing=0
+                )
+            for step in range(FRAMES // len(CHROMA_TARGETS)):
+                await chroma.async_apply_scene(
+                    {target: Color(0, step, 0) for target in CHROMA_TARGETS}, sleep=0
+                )
+        finally:
+            await chroma.async_close()
+
+        return len(server.frames), _connections(server)
+
+
+def test_frames_reuse_connections() -> None:
+    """Streamed frames don't open a connection each"""
+
+    frames, connections = asyncio.run(_async_stream())
+
+    assert frames >= FRAMES
+    assert 1 <= connections <= DEFAULT_LIMIT_PER_HOST
+
+
+def test_paced_frames_reuse_connections() -> None:
+    """Pipelined frames of the pacing mode don't open a connection each"""
+
+    frames, connections = asyncio.run(_async_stream(pacing=True))
+
+    assert frames >= FRAMES
+    assert 1 <= connections <= DEFAULT_LIMIT_PER_HOST
+
+
+def test_sequential_frames_share_connection() -> None:
+    """Frames sent one after another go over a single connection"""
+
+    async def _async_run() -> int:
+        async with ChromaSDKServer(port=0) as server:
+            chroma = AIOChroma("127.0.0.1", [KEY_KEYBOARD], "EN_US", port=server.port)
+            try:
+                await chroma.async_connect()
+                for step in range(FRAMES):
+                    await chroma.async_effect_color(
+                        KEY_KEYBOARD, Color(step, 0, 0), sleep=0
+                    )
+            finally:
+                await chroma.async_close()
+            return _connections(server)
+
+    assert asyncio.run(_async_run()) == 1